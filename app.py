@@ -12,14 +12,28 @@ import dotenv
 import os
 
 
-# local imports
-from main.models import db
-from main.views import bp_main
-from app_custom_serialization import CustomJSONEncoder
+def create_app() -> Flask:
+    """ Create app function
 
+    Importing this module builds nothing: the models, adapters, views and
+    commands are imported by the first create_app() call, and the engine
+    connects on the first query.
 
-def create_app() -> Flask:
-    """ Create app function """
+    The blueprints are imported and registered here, not on the first
+    request of their prefix: Flask, SQLAlchemy and the models make up
+    most of the startup time and every request needs them, the view
+    modules add little on top.
+    """
+
+    # local imports
+    from main.models import db
+    from main.approvals import rebuild_approvals_command
+    from main.counters import rebuild_counters_command
+    from main.order_names import rebuild_order_names_command, check_order_names_command
+    from main.search import rebuild_search_command
+    from main.views import bp_main
+    from app_custom_serialization import CustomJSONEncoder, init_json_backend
+    from grm import response_cache, metrics, replica, InstrumentedQueuePool
 
     the_app = Flask(__name__)
 
@@ -28,24 +42,66 @@ def create_app() -> Flask:
     the_app.json_encoder = CustomJSONEncoder
 
     the_app.config.update({
-        "SQLALCHEMY_DATABASE_URI": f"postgresql+psycopg2://"
+        "SQLALCHEMY_DATABASE_URI": os.getenv("DB_URI") or
+                                   f"postgresql+psycopg2://"
                                    f"{os.getenv('DB_USER')}:"
                                    f"{os.getenv('DB_PASSWORD')}@"
                                    f"{os.getenv('DB_HOST')}:"
                                    f"{os.getenv('DB_PORT')}/"
                                    f"{os.getenv('DB_NAME')}",
+        "SQLALCHEMY_BINDS": {"replica": os.getenv("DB_REPLICA_URI")} if os.getenv("DB_REPLICA_URI") else {},
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "SQLALCHEMY_ENGINE_OPTIONS": {
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "YES") == "YES",
+        },
         "JSON_AS_ASCII": False,
+        "JSON_BACKEND": os.getenv("JSON_BACKEND", "auto"),
+        "CACHE_MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 1024)),
+        "CACHE_TTL": float(os.getenv("CACHE_TTL", 30)),
+        "CACHE_MAX_BYTES": int(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+        "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "YES") == "YES",
+        "REPLICA_STICKY_SECONDS": float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5)),
     })
 
+    # SQLite stand-ins keep the dialect's own pool, connections may still
+    # move between worker threads; server databases get the instrumented pool
+    if the_app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        the_app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {"check_same_thread": False}
+    else:
+        the_app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        })
+
+    db.init_app(the_app)
+    response_cache.init_app(the_app)
+    metrics.init_app(the_app)
+    replica.init_app(the_app)
+    init_json_backend(the_app)
+
     the_app.register_blueprint(bp_main, url_prefix="/")
 
+    the_app.cli.add_command(rebuild_counters_command)
+    the_app.cli.add_command(rebuild_approvals_command)
+    the_app.cli.add_command(rebuild_search_command)
+    the_app.cli.add_command(rebuild_order_names_command)
+    the_app.cli.add_command(check_order_names_command)
+
     return the_app
 
 
-app = create_app()
-with app.app_context():
-    db.init_app(app)
+def __getattr__(name: str):
+    """ Module level app for `from app import app`, FLASK_APP=app and WSGI servers, built on first access """
+
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run()
+    create_app().run()
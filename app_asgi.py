@@ -0,0 +1,30 @@
+"""
+    ASGI entry point, read endpoints on the async driver
+
+    uvicorn app_asgi:application --workers 4
+
+    Opt-in, not a recommended way to run the app. The only measurement so
+    far is benchmarks.bench_async on a SQLite file, where it is no faster
+    than the WSGI app: 266 against 306 req/s with one worker, 276 against
+    277 with 32. Nothing has been measured against Postgres, so no async
+    gain is known yet; the WSGI app stays the default entry point.
+"""
+
+# local imports
+from app import create_app
+from grm import AsyncReadApp
+from main.models import db
+
+
+read_endpoints = [
+    f"bp_main.bp_{entity}.{view}"
+    for entity, views in {
+        "users": ["index_all_users", "index_user_by_pk", "index_get_users_count"],
+        "orders": ["index_all_orders", "index_search_orders", "index_order_by_pk", "index_get_orders_count"],
+        "offers": ["index_all_offers", "index_offer_by_pk", "index_get_offers_count"],
+    }.items()
+    for view in views
+]
+
+app = create_app()
+application = AsyncReadApp(app, db, read_endpoints)
@@ -0,0 +1,189 @@
+"""
+    check_indexes
+
+    Runs EXPLAIN for the queries of every list and count adapter, for every
+    whitelisted filter_by/order_by combination, and fails if one of them
+    scans a whole table instead of using an index, or sorts its rows
+    instead of reading them in index order. It runs ANALYZE first, so the
+    plans are the ones of a database with planner statistics.
+
+    python app_check_indexes.py
+"""
+from __future__ import annotations
+
+# global imports
+import re
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# local imports
+from main.models import db
+from main.users.adapter import AllUsersAdapter, PKUserListAdapter
+from main.orders.adapter import AllOrdersAdapter, PKOrderListAdapter
+from main.offers.adapter import AllOffersAdapter, PKOfferListAdapter
+
+
+# Combinations that cannot use an index with the current schema, by exact
+# name. Keep this list short: every entry is a full table scan or a sort of
+# every matching row in production.
+UNINDEXED = {
+    # an unfiltered count reads every row whatever the plan is
+    "users/count filter_by=default",
+    "orders/count filter_by=default",
+    "offers/count filter_by=default",
+    # the role filter is on users and the counter sort key on users_counters
+    *(f"users filter_by={filter_by} order_by={order_by}"
+      for filter_by in ("customer", "executor")
+      for order_by in ("owner", "owner_asc", "executor", "executor_asc", "offers", "offers_asc")),
+    # a range on one column sorted by another column
+    *(f"orders filter_by=default price order_by={order_by}"
+      for order_by in ("default", "start", "start_asc", "end", "end_asc")),
+    *(f"orders filter_by=default start order_by={order_by}"
+      for order_by in ("end", "end_asc", "price", "price_asc")),
+    *(f"orders filter_by=default end order_by={order_by}"
+      for order_by in ("default", "start", "start_asc", "price", "price_asc")),
+    # sorts on the start date of the outer joined order
+    *(f"offers filter_by={filter_by} order_by={order_by}"
+      for filter_by in ("default", "user", "rejected", "approved", "user_rejected", "user_approved")
+      for order_by in ("order_date", "order_date_asc")),
+    # the offers of one order sorted by the name of the joined executor
+    "offers filter_by=order order_by=default",
+    "offers filter_by=order order_by=user",
+}
+
+TABLES = ("users", "users_counters", "orders", "offers")
+
+sqlite_full_scan = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+sqlite_sort = re.compile(r"^USE TEMP B-TREE FOR ORDER BY$")
+postgres_full_scan = re.compile(r"Seq Scan on (\w+)")
+postgres_sort = re.compile(r"^\s*(?:->\s+)?Sort\s")
+
+
+order_ranges = {
+    "price": {"price_min": 1000, "price_max": 2000},
+    "start": {"start_from": "01.01.2021", "start_to": "31.01.2021"},
+    "end": {"end_from": "01.01.2021", "end_to": "31.01.2021"},
+}
+
+
+def combinations():
+    """ (name, adapter factory) for every filter_by/order_by combination """
+
+    for filter_by in AllUsersAdapter.filter_by_list:
+        for order_by in AllUsersAdapter.order_by_list:
+            yield f"users filter_by={filter_by} order_by={order_by}", \
+                lambda f=filter_by, o=order_by: AllUsersAdapter(5, 0, f, o)
+        yield f"users/count filter_by={filter_by}", \
+            lambda f=filter_by: PKUserListAdapter(f)
+
+    for filter_by in AllOrdersAdapter.filter_by_list:
+        for order_by in AllOrdersAdapter.order_by_list:
+            yield f"orders filter_by={filter_by} order_by={order_by}", \
+                lambda f=filter_by, o=order_by: AllOrdersAdapter(10, 0, f, o, 1)
+        yield f"orders/count filter_by={filter_by}", \
+            lambda f=filter_by: PKOrderListAdapter(f, 1)
+
+        for name, ranges in order_ranges.items():
+            for order_by in AllOrdersAdapter.order_by_list:
+                yield f"orders filter_by={filter_by} {name} order_by={order_by}", \
+                    lambda f=filter_by, o=order_by, r=ranges: AllOrdersAdapter(10, 0, f, o, 1, None, **r)
+            yield f"orders/count filter_by={filter_by} {name}", \
+                lambda f=filter_by, r=ranges: PKOrderListAdapter(f, 1, **r)
+
+    for filter_by in AllOffersAdapter.filter_by_list:
+        for order_by in AllOffersAdapter.order_by_list:
+            yield f"offers filter_by={filter_by} order_by={order_by}", \
+                lambda f=filter_by, o=order_by: AllOffersAdapter(10, 0, f, o, 1, 1)
+        yield f"offers/count filter_by={filter_by}", \
+            lambda f=filter_by: PKOfferListAdapter(f, 1, 1)
+
+
+@contextmanager
+def capture_statements(engine):
+    """ Collect (statement, parameters) of every query run inside the block """
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(engine, statement, parameters) -> list[str]:
+    """ Problems of the statement plan: tables scanned without an index and
+    sorts that do not follow an index
+    """
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+
+        if engine.dialect.name == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[-1] for row in cursor.fetchall()]
+            scans = [match.group(1) for match in map(sqlite_full_scan.match, plan) if match]
+            sorts = [line for line in plan if sqlite_sort.match(line)]
+        else:
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+            scans = [match.group(1) for line in plan for match in postgres_full_scan.finditer(line)]
+            sorts = [line for line in plan if postgres_sort.match(line)]
+            cursor.execute("RESET enable_seqscan")
+
+        cursor.close()
+    finally:
+        connection.close()
+
+    problems = [f"full scan on {table}" for table in scans if table in TABLES]
+
+    return problems + (["sort without an index"] if sorts else [])
+
+
+def check_indexes() -> list[str]:
+    """ Names of the combinations that stopped using an index """
+
+    engine = db.engine
+    failures = []
+
+    # the plans of a database without statistics are not the production plans
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    for name, factory in combinations():
+        with capture_statements(engine) as statements:
+            factory()
+
+        problems = set()
+        for statement, parameters in statements:
+            problems.update(explain(engine, statement, parameters))
+
+        if problems and name not in UNINDEXED:
+            failures.append(f"{name}: {', '.join(sorted(problems))}")
+
+        print(f"{'SLOW' if problems else 'ok  '} {name}")
+
+    return failures
+
+
+if __name__ == "__main__":
+
+    from app import create_app
+
+    app = create_app()
+
+    with app.app_context():
+        result = check_indexes()
+
+    if result:
+        print("\n".join(["", "Queries without an index:", *result]))
+        sys.exit(1)
+
+    print("All queries use an index.")
@@ -5,19 +5,28 @@
 
 # global imports
 import datetime
+from decimal import Decimal
+from functools import lru_cache
 
+from flask import Flask, Response, json, jsonify, current_app
 from flask.json import JSONEncoder
 from datetime import date
 
 # flask json custom serialization
 
 
+@lru_cache(maxsize=4096)
+def format_date(the_date: date) -> str:
+    """ dd.mm.YYYY, memoized: list responses repeat the same dates a lot """
+    return the_date.strftime("%d.%m.%Y")
+
+
 class CustomJSONEncoder(JSONEncoder):
     """ Custom flask JSON encoder, correct date format """
     def default(self, obj):
+        if isinstance(obj, date):
+            return format_date(obj)
         try:
-            if isinstance(obj, date):
-                return obj.strftime("%d.%m.%Y")
             iterable = iter(obj)
         except TypeError:
             pass
@@ -31,4 +40,83 @@ def to_date(the_date: str) -> datetime:
     return datetime.datetime.strptime(the_date, "%d.%m.%Y")
 
 
+# json backends, selected by JSON_BACKEND in create_app()
+
+
+class StdlibJSONBackend:
+    """ flask.jsonify with the app json_encoder """
+
+    name = "stdlib"
+
+    def dumps(self, data) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def response(self, data) -> Response:
+        return jsonify(data)
+
+
+class OrjsonJSONBackend:
+    """ orjson, same output as StdlibJSONBackend with CustomJSONEncoder and JSON_AS_ASCII=False """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        self._sort_keys = orjson.OPT_SORT_KEYS
+        self._newline = orjson.OPT_APPEND_NEWLINE
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, date):
+            return format_date(obj)
+        if isinstance(obj, Decimal):
+            return str(obj)
+        try:
+            iterable = iter(obj)
+        except TypeError:
+            pass
+        else:
+            return list(iterable)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, data) -> bytes:
+        option = self._option & ~self._newline
+        if current_app.config["JSON_SORT_KEYS"]:
+            option |= self._sort_keys
+        return self._dumps(data, default=self.default, option=option)
+
+    def response(self, data) -> Response:
+        config = current_app.config
+
+        # pretty printing is only for debugging, leave it to flask
+        if config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug:
+            return jsonify(data)
+
+        option = self._option | (self._sort_keys if config["JSON_SORT_KEYS"] else 0)
+
+        return current_app.response_class(
+            self._dumps(data, default=self.default, option=option),
+            mimetype=config["JSONIFY_MIMETYPE"]
+        )
+
+
+def init_json_backend(app: Flask):
+    """ Select the json backend: JSON_BACKEND = auto | stdlib | orjson """
+
+    name = app.config.get("JSON_BACKEND", "auto")
+
+    # orjson writes raw UTF-8 only, it cannot escape to ASCII
+    if name in ["auto", "orjson"] and not app.config["JSON_AS_ASCII"]:
+        try:
+            backend = OrjsonJSONBackend()
+        except ImportError:
+            if name == "orjson":
+                raise
+            backend = StdlibJSONBackend()
+    else:
+        backend = StdlibJSONBackend()
 
+    app.extensions["json_backend"] = backend
@@ -0,0 +1,165 @@
+"""
+    generate
+
+    Deterministic synthetic users, orders and offers, streamed into the
+    database or into json files in the app_install format.
+
+    python app_generate.py --users 1000000 --json data/json_generated
+    python app_generate.py --users 1000000 --db --replace
+
+    --db loads into DB_URI or the database from .env and needs empty
+    tables, or --replace to empty them first.
+"""
+
+# global imports
+import argparse
+import datetime
+import time
+from pathlib import Path
+
+# local imports
+from main.generator import \
+    GeneratorConfig, load_pools, generate_users, generate_orders, generate_offers, \
+    to_json_user, to_json_order, to_json_offer, write_json_array
+from main.models_checkers import validate_users, check_description, check_address, check_price, check_date
+
+
+def int_range(text: str) -> tuple:
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def date_range(text: str) -> tuple:
+    low, _, high = text.partition(":")
+    return datetime.date.fromisoformat(low), datetime.date.fromisoformat(high or low)
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Generate users, orders and offers")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--customer-share", type=float, default=0.5, help="share of customers among users")
+    parser.add_argument("--orders-per-customer", type=int_range, default=(0, 6), metavar="MIN-MAX")
+    parser.add_argument("--offers-per-order", type=int_range, default=(0, 4), metavar="MIN-MAX")
+    parser.add_argument("--start-dates", type=date_range, default=(datetime.date(2020, 1, 1), datetime.date(2024, 12, 31)),
+                        metavar="YYYY-MM-DD:YYYY-MM-DD")
+    parser.add_argument("--duration-days", type=int_range, default=(1, 365), metavar="MIN-MAX")
+    parser.add_argument("--prices", type=int_range, default=(100, 10_000), metavar="MIN-MAX")
+    parser.add_argument("--seed", type=int, default=16)
+    parser.add_argument("--check", action="store_true", help="run models_checkers on every row")
+
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--json", type=Path, metavar="DIR", help="write users.json, orders.json, offers.json")
+    target.add_argument("--db", action="store_true", help="load into the database")
+
+    parser.add_argument("--replace", action="store_true", help="with --db, delete existing rows first")
+
+    return parser.parse_args()
+
+
+def checked(model_name: str, rows):
+    """ Pass rows through, failing on the first one models_checkers refuses """
+
+    for row in rows:
+
+        if model_name == "users":
+            messages = validate_users([row])[0]
+        elif model_name == "orders":
+            messages = [message for message in [
+                check_description(row["description"]),
+                check_date(datetime.datetime.combine(row["end_date"], datetime.time()),
+                           datetime.datetime.combine(row["start_date"], datetime.time())),
+                check_address(row["address"]),
+                check_price(row["price"]),
+            ] if message is not None]
+        else:
+            messages = []
+
+        if messages:
+            raise ValueError(f"{model_name} {row['id']}: {'; '.join(messages)}")
+
+        yield row
+
+
+def report(name: str, total: int, started: float):
+    elapsed = time.perf_counter() - started
+    print(f"    {name}: {total} rows, {total / elapsed:.0f} rows/sec")
+
+
+def to_json(config: GeneratorConfig, pools: dict, directory: Path, check: bool):
+
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for name, rows, to_item in [
+        ("users", generate_users(config, pools), to_json_user),
+        ("orders", generate_orders(config, pools), to_json_order),
+        ("offers", generate_offers(config, pools), to_json_offer),
+    ]:
+        started = time.perf_counter()
+        rows = checked(name, rows) if check else rows
+        report(name, write_json_array(directory / f"{name}.json", map(to_item, rows)), started)
+
+
+def to_database(config: GeneratorConfig, pools: dict, replace: bool, check: bool):
+
+    from sqlalchemy import delete
+
+    from app import create_app
+    from main.bulk import bulk_load, reset_sequence
+    from main.models import db, User, UserCounter, Order, Offer
+    from main.read_models import rebuild_read_models
+
+    with create_app().app_context():
+        db.create_all()
+        session = db.session
+
+        if replace:
+            with session.begin():
+                for model in [Offer, Order, UserCounter, User]:
+                    session.execute(delete(model))
+
+        for name, model, rows in [
+            ("users", User, generate_users(config, pools)),
+            ("orders", Order, generate_orders(config, pools)),
+            ("offers", Offer, generate_offers(config, pools)),
+        ]:
+            started = time.perf_counter()
+
+            with session.begin():
+                total = bulk_load(session, model, checked(name, rows) if check else rows)
+                reset_sequence(session, model)
+
+            report(name, total, started)
+
+        with session.begin():
+            rebuild_read_models(session)
+
+
+def main():
+
+    args = parse_args()
+
+    config = GeneratorConfig(
+        users=args.users,
+        customer_share=args.customer_share,
+        orders_per_customer=args.orders_per_customer,
+        offers_per_order=args.offers_per_order,
+        start_dates=args.start_dates,
+        duration_days=args.duration_days,
+        prices=args.prices,
+        seed=args.seed,
+    )
+    pools = load_pools()
+
+    print("Generate ... ")
+
+    if args.json is not None:
+        to_json(config, pools, args.json, args.check)
+    else:
+        to_database(config, pools, args.replace, args.check)
+
+    print("Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,11 @@
 
 # global imports
 import datetime
-from operator import itemgetter
+import time
 from flask import Flask
+from sqlalchemy import inspect, text, update
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.schema import Column, CreateColumn
 from sqlalchemy.orm.session import Session
 from sqlalchemy.exc import SQLAlchemyError
 from pathlib import Path
@@ -15,11 +18,17 @@ import json
 
 
 # local imports
-from main.models import db, User, Order, Offer
+from main.models import db, User, UserCounter, Order, Offer, TableVersion
+from main.counters import rebuild_counters
+from main.versions import bump_versions
+from main.approvals import rebuild_approvals
+from main.order_names import rebuild_order_names
+from main.search import rebuild_search
+from main.read_models import rebuild_read_models
+from main.bulk import bulk_load, reset_sequence
 from app import create_app
 
 app: Flask = create_app()
-db.init_app(app)
 
 
 def create_tables():
@@ -45,77 +54,244 @@ def create_tables():
     print("Done")
 
 
-def fill_tables():
-    """ Fill all tables from json """
+def add_column(session: Session, inspector: Inspector, column: Column, default: str = None) -> bool:
+    """ Add a model column the table lacks, True if it was added
 
-    print("Fill tables ... ", end="")
+    default is the SQL default that fills the existing rows of a NOT NULL
+    column, it is dropped again where the database allows it.
+    """
 
-    if os.getenv("DB_FILLED_ALL") is None:
+    table = column.table.name
 
-        data_path = Path.cwd() / "data/json_source"
+    if column.name in {existing["name"] for existing in inspector.get_columns(table)}:
+        return False
 
-        data_file = data_path / "users.json"
+    dialect = session.get_bind().dialect
+    definition = str(CreateColumn(column).compile(dialect=dialect))
 
-        with data_file.open("rt", encoding="utf-8") as fin:
-            data_users = json.load(fin)
+    if default is not None:
+        definition = f"{definition} DEFAULT {default}"
 
-        data_file = data_path / "orders.json"
+    session.execute(text(f"ALTER TABLE {table} ADD COLUMN {definition}"))
 
-        with data_file.open("rt", encoding="utf-8") as fin:
-            data_orders = json.load(fin)
+    if default is not None and dialect.name == "postgresql":
+        session.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column.name} DROP DEFAULT"))
 
-        data_file = data_path / "offers.json"
+    return True
 
-        with data_file.open("rt", encoding="utf-8") as fin:
-            data_offers = json.load(fin)
 
-        data_users = sorted(data_users, key=itemgetter("id"))
-        data_orders = sorted(data_orders, key=itemgetter("id"))
-        data_offers = sorted(data_offers, key=itemgetter("id"))
+def add_indexes(session: Session):
+    """ Create the model indexes the tables lack, over the columns the tables have """
 
-        session: Session = db.session
-        with session.begin():
-            try:
-                for user in data_users:
-                    del user["id"]
-                    session.add(User(**user))
-                    session.flush()
+    inspector = inspect(session.connection())
 
-            except SQLAlchemyError as exception:
-                session.rollback()
-                print("Failed")
-                raise exception
+    for table in db.Model.metadata.sorted_tables:
 
-            else:
-                session.commit()
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name not in existing and {column.name for column in index.columns} <= columns:
+                index.create(session.connection())
+
+
+def users_without_counters(session: Session) -> bool:
+    """ True if a user has no users_counters row """
+
+    return session.query(User.id)\
+        .join(UserCounter, UserCounter.user_id == User.id, isouter=True)\
+        .filter(UserCounter.user_id.is_(None))\
+        .first() is not None
+
+
+def migrate_tables():
+    """ Create and fill the tables added after the first install """
+
+    print("Migrate tables ... ", end="")
+
+    session: Session = db.session
+    with session.begin():
+
+        try:
+            inspector = inspect(session.connection())
+
+            # the users list inner joins the counters, every user needs a row
+            if not inspector.has_table(UserCounter.__tablename__) or users_without_counters(session):
+                rebuild_counters(session)
+
+            if not inspector.has_table(TableVersion.__tablename__):
+                TableVersion.__table__.create(session.connection())
+                bump_versions(session, "users", "orders", "offers")
+
+            if add_column(session, inspector, User.__table__.c.full_name, default="''"):
+                session.execute(
+                    update(User)
+                    .values(full_name=User.first_name + " " + User.last_name)
+                    .execution_options(synchronize_session=False)
+                )
+                bump_versions(session, "users")
+
+            if add_column(session, inspector, Offer.__table__.c.is_approved):
+                rebuild_approvals(session)
+                bump_versions(session, "offers")
+
+            added_names = [
+                add_column(session, inspector, column)
+                for column in [Order.__table__.c.customer_name, Order.__table__.c.executor_name]
+            ]
+
+            if any(added_names):
+                rebuild_order_names(session)
+                bump_versions(session, "orders")
+
+            # the Postgres index DDL is IF NOT EXISTS, the SQLite index is a table
+            if session.get_bind().dialect.name == "postgresql" or not inspector.has_table("orders_search"):
+                rebuild_search(session)
+
+            add_indexes(session)
+        except SQLAlchemyError as exception:
+            session.rollback()
+            print("Failed")
+            raise exception
+        else:
+            session.commit()
+
+    print("Done")
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 16):
+    """ Stream the items of a top level JSON array without loading the whole file
+
+    The items are decoded in place at an index into the buffer, which is
+    trimmed once per chunk read instead of once per item.
+    """
+
+    decoder = json.JSONDecoder()
+    whitespace = json.decoder.WHITESPACE
+
+    with path.open("rt", encoding="utf-8") as fin:
+
+        buffer = ""
+        index = 0
+        eof = False
+        # "[" before the array, "item" where an item must follow,
+        # "first" after the "[", "next" after an item
+        expect = "["
+
+        while True:
+
+            index = whitespace.match(buffer, index).end()
+
+            if index == len(buffer):
+                if eof:
+                    raise ValueError(f"{path.name} {'is not' if expect == '[' else 'ends inside'} a JSON array")
+                chunk = fin.read(chunk_size)
+                eof = not chunk
+                buffer, index = buffer[index:] + chunk, 0
+                continue
+
+            char = buffer[index]
+
+            if expect == "[":
+                if char != "[":
+                    raise ValueError(f"{path.name} is not a JSON array")
+                index += 1
+                expect = "first"
+                continue
+
+            if char == "]" and expect in ("first", "next"):
+                return
+
+            if expect == "next":
+                if char != ",":
+                    raise ValueError(f"{path.name}: expected ',' or ']' between the array items")
+                index += 1
+                expect = "item"
+                continue
+
+            if char in ",]":
+                raise ValueError(f"{path.name}: unexpected {char!r} in the JSON array")
 
-        with session.begin():
             try:
-                for order in data_orders:
-                    del order["id"]
-                    order["customer_id"] += 1
-                    order["executor_id"] += 1
-                    order["start_date"] = datetime.datetime.strptime(order["start_date"], "%m/%d/%Y").date()
-                    order["end_date"] = datetime.datetime.strptime(order["end_date"], "%m/%d/%Y").date()
-                    session.add(Order(**order))
-                    session.flush()
+                item, end = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
 
-            except SQLAlchemyError as exception:
-                session.rollback()
-                print("Failed")
-                raise exception
+            # an item cut by the chunk end fails to decode, or decodes as a
+            # shorter number, without a separator after it
+            if not eof and (end == len(buffer) or buffer[end] not in ",] \t\n\r"):
+                chunk = fin.read(chunk_size)
+                eof = not chunk
+                buffer, index = buffer[index:] + chunk, 0
+                continue
 
-            else:
-                session.commit()
+            yield item
+            index = end
+            expect = "next"
+
+
+def to_user_row(user: dict) -> dict:
+    return user
+
+
+def to_order_row(order: dict) -> dict:
+    order["id"] += 1
+    order["customer_id"] += 1
+    order["executor_id"] += 1
+    order["start_date"] = datetime.datetime.strptime(order["start_date"], "%m/%d/%Y").date()
+    order["end_date"] = datetime.datetime.strptime(order["end_date"], "%m/%d/%Y").date()
+    return order
+
+
+def to_offer_row(offer: dict) -> dict:
+    offer["id"] += 1
+    offer["order_id"] += 1
+    offer["executor_id"] += 1
+    return offer
+
+
+def fill_tables():
+    """ Fill all tables from json """
+
+    print("Fill tables ... ")
+
+    if os.getenv("DB_FILLED_ALL") is None:
+
+        data_path = Path.cwd() / "data/json_source"
+
+        sources = [
+            (User, data_path / "users.json", to_user_row),
+            (Order, data_path / "orders.json", to_order_row),
+            (Offer, data_path / "offers.json", to_offer_row),
+        ]
+
+        session: Session = db.session
+
+        for model, data_file, to_row in sources:
+
+            started = time.perf_counter()
+
+            with session.begin():
+                try:
+                    total = bulk_load(session, model, map(to_row, iter_json_array(data_file)))
+                    reset_sequence(session, model)
+
+                except SQLAlchemyError as exception:
+                    session.rollback()
+                    print("Failed")
+                    raise exception
+
+                else:
+                    session.commit()
+
+            elapsed = time.perf_counter() - started
+            print(f"    {model.__tablename__}: {total} rows, {total / elapsed:.0f} rows/sec")
 
         with session.begin():
             try:
-                for offer in data_offers:
-                    del offer["id"]
-                    offer["order_id"] += 1
-                    offer["executor_id"] += 1
-                    session.add(Offer(**offer))
-                    session.flush()
+                rebuild_read_models(session)
 
             except SQLAlchemyError as exception:
                 session.rollback()
@@ -131,6 +307,7 @@ def fill_tables():
 
 with app.app_context():
     create_tables()
+    migrate_tables()
     fill_tables()
 
 print("Setup completed.")
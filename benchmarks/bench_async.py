@@ -0,0 +1,105 @@
+"""
+    Benchmark
+    read throughput, WSGI threads against the ASGI async read mode
+
+    python -m benchmarks.bench_async [requests per worker] [workers ...]
+
+    Both paths run in process against the database from .env with the
+    response cache off: the WSGI app with one thread per worker, the
+    ASGI application with one asyncio task per worker.
+"""
+
+# global imports
+import asyncio
+import statistics
+import sys
+import time
+
+# local imports
+from app_asgi import application
+from benchmarks.load_pool import paths, run as run_wsgi
+from grm import response_cache
+
+
+async def request(path: str) -> int:
+    """ One GET through the ASGI application, returns the status """
+
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": route,
+        "root_path": "",
+        "query_string": query.encode("ascii"),
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 0),
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await application(scope, receive, send)
+    return status["code"]
+
+
+async def worker(requests: int, offset: int, latencies: list, errors: list):
+
+    for index in range(requests):
+        started = time.perf_counter()
+        code = await request(paths[(offset + index) % len(paths)])
+        latencies.append(time.perf_counter() - started)
+
+        if code != 200:
+            errors.append(code)
+
+
+async def run_asgi(workers: int, requests: int) -> dict:
+
+    latencies = []
+    errors = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(requests, offset, latencies, errors) for offset in range(workers)])
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+        "errors": len(errors),
+    }
+
+
+async def main():
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    levels = [int(argument) for argument in sys.argv[2:]] or [1, 8, 32, 128]
+
+    response_cache.max_entries = 0
+
+    print(f"{'workers':>8} {'mode':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    for workers in levels:
+        for mode, result in [
+            ("wsgi", await asyncio.to_thread(run_wsgi, workers, requests)),
+            ("asgi", await run_asgi(workers, requests)),
+        ]:
+            print(f"{workers:>8} {mode:>5} {result['rps']:>9.0f} {result['p50']:>8.2f} "
+                  f"{result['p95']:>8.2f} {result['p99']:>8.2f} {result['errors']:>7}")
+
+    await application.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""
+    Benchmark
+    check_name against the previous reduce() implementation, and validate_users
+
+    python -m benchmarks.bench_checkers
+
+    The reference implementation lives in tests/reference_checkers.py,
+    tests/test_models_checkers.py checks that both implementations agree.
+"""
+from __future__ import annotations
+
+# global imports
+import random
+import timeit
+
+# local imports
+from main.models_checkers import check_name, validate_users
+from tests.reference_checkers import reduce_check_name, random_names
+
+
+def main():
+
+    for length in [10, 100, 1000, 3000]:
+        name = ("ab'" * length)[:length]
+        for function in [reduce_check_name, check_name]:
+            number = max(1, 10_000 // length)
+            best = min(timeit.repeat(lambda: function(name), number=number, repeat=3)) / number
+            print(f"{function.__name__:<18} {length:>5} chars  {best * 1e6:10.1f} us")
+
+    generator = random.Random(12)
+    first_names = random_names(generator, 300, 8)
+    users = [{
+        "first_name": generator.choice(first_names),
+        "last_name": "Pauloh",
+        "age": 31,
+        "email": "elliot16@mymail.com",
+        "role": "customer",
+        "phone": "6197021684",
+    } for _ in range(10_000)]
+
+    best = min(timeit.repeat(lambda: validate_users(users), number=1, repeat=3))
+    print(f"validate_users     {len(users)} users  {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
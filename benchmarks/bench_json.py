@@ -0,0 +1,64 @@
+"""
+    Benchmark
+    json backends on large order lists
+
+    python -m benchmarks.bench_json [rows]
+"""
+
+# global imports
+import datetime
+import random
+import sys
+import timeit
+
+from flask import Flask
+
+# local imports
+from app_custom_serialization import CustomJSONEncoder, StdlibJSONBackend, OrjsonJSONBackend, format_date
+
+
+def make_orders(rows: int) -> list:
+    """ Rows shaped like the AllOrdersAdapter output """
+
+    generator = random.Random(16)
+    start = datetime.date(2022, 1, 1)
+
+    return [{
+        "id": index,
+        "name": "Встретить тетю на вокзале",
+        "description": "Встретить тетю на вокзале с табличкой. Отвезти ее в магазин, помочь погрузить покупки.",
+        "start_date": start + datetime.timedelta(days=generator.randrange(365)),
+        "end_date": start + datetime.timedelta(days=generator.randrange(365, 730)),
+        "address": "4759 William Haven Apt. 194\nWest Corey, TX 43780",
+        "price": generator.randrange(100, 10_000),
+        "customer_id": generator.randrange(1, 1000),
+        "executor_id": generator.randrange(1, 1000),
+        "customer": "Hudson Pauloh",
+        "executor": "George Matter",
+    } for index in range(rows)]
+
+
+def main(rows: int = 10_000, repeat: int = 5):
+
+    app = Flask(__name__)
+    app.json_encoder = CustomJSONEncoder
+    app.config["JSON_AS_ASCII"] = False
+
+    orders = make_orders(rows)
+    backends = [StdlibJSONBackend(), OrjsonJSONBackend()]
+
+    with app.app_context():
+
+        outputs = [backend.response(orders).get_data() for backend in backends]
+        assert all(output == outputs[0] for output in outputs), "backends disagree"
+
+        print(f"{rows} orders, {len(outputs[0]) / 1024 / 1024:.1f} MiB of json")
+
+        for backend in backends:
+            format_date.cache_clear()
+            best = min(timeit.repeat(lambda: backend.response(orders), number=1, repeat=repeat))
+            print(f"{backend.name:<8} {best * 1000:8.1f} ms   {rows / best:10.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,48 @@
+"""
+    Benchmark
+    per-row cost of the model to dict serializers
+
+    python -m benchmarks.bench_serializers [rows]
+"""
+
+# global imports
+import sys
+import timeit
+
+from sqlalchemy import inspect
+
+# local imports
+from grm import to_dict_from_alchemy_model, get_serializer
+from main.models import User
+
+
+def inspect_per_row(model):
+    """ The serializer before the registry: inspect() for every row """
+    if model is None:
+        return None
+    return {attr.key: getattr(model, attr.key) for attr in inspect(model).mapper.column_attrs}
+
+
+def main(rows: int = 10_000, repeat: int = 5):
+
+    users = [
+        User(id=index, first_name="Hudson", last_name="Pauloh", age=31,
+             email="elliot16@mymail.com", role="customer", phone=f"{index:010d}")
+        for index in range(rows)
+    ]
+
+    subset = get_serializer(User, ["id", "first_name", "last_name"], {"first_name": "name"})
+
+    assert [inspect_per_row(user) for user in users] == [to_dict_from_alchemy_model(user) for user in users]
+
+    for name, serializer in [
+        ("inspect per row", inspect_per_row),
+        ("registry", to_dict_from_alchemy_model),
+        ("registry, 3 columns", subset),
+    ]:
+        best = min(timeit.repeat(lambda: [serializer(user) for user in users], number=1, repeat=repeat))
+        print(f"{name:<22} {best * 1000:8.2f} ms / {rows} rows   {best / rows * 1e9:8.0f} ns / row")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
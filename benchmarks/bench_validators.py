@@ -0,0 +1,57 @@
+"""
+    Benchmark
+    worst case latency of the email and phone checkers
+
+    python -m benchmarks.bench_validators
+
+    tests/test_models_checkers.py fuzzes the checkers against the regexes.
+"""
+
+# global imports
+import re
+import time
+
+# local imports
+from main.models_checkers import \
+    check_email, check_phone, email_regex, phone_regex, \
+    EMAIL_MAX_LENGTH, PHONE_MAX_LENGTH
+
+
+def adversarial(length: int) -> dict:
+    return {
+        "email atoms": "a." * (length // 2),
+        "email domain": "a@" + "a." * (length // 2),
+        "email quoted": '"' + "\\a" * (length // 2),
+        "email literal": "a@[" + " " * length,
+        "phone digits": "1" * length,
+        "phone separators": "+1 (" + "1-" * (length // 2),
+    }
+
+
+def worst_case(function, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+
+    print(f"caps: email {EMAIL_MAX_LENGTH}, phone {PHONE_MAX_LENGTH} characters")
+    print(f"{'input':<18} {'length':>8} {'regex us':>10} {'checker us':>11}")
+
+    for length in [30, 100, 10_000, 1_000_000]:
+        for name, text in adversarial(length).items():
+            is_phone = name.startswith("phone")
+            regex = phone_regex if is_phone else email_regex
+            checker = check_phone if is_phone else check_email
+
+            regex_time = worst_case(lambda: re.fullmatch(regex, text), 3 if length > 10_000 else 20)
+            checker_time = worst_case(lambda: checker(text))
+            print(f"{name:<18} {len(text):>8} {regex_time * 1e6:>10.1f} {checker_time * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+    Load test
+    read latency against worker concurrency
+
+    python -m benchmarks.load_pool [requests per worker] [workers ...]
+
+    Runs the app in process against the database from .env, with the
+    response cache off so every request checks out a connection. The wait
+    and overflow columns need the instrumented pool of server databases,
+    they stay empty on SQLite.
+"""
+
+# global imports
+import statistics
+import sys
+import threading
+import time
+
+# local imports
+from app import create_app
+from grm import response_cache, InstrumentedQueuePool
+from main.models import db
+
+
+app = create_app()
+
+paths = [
+    "/users/?limit=20",
+    "/users/5",
+    "/orders/?limit=20&order_by=price",
+    "/orders/12",
+    "/offers/?limit=20",
+    "/offers/count",
+]
+
+
+def worker(requests: int, offset: int, latencies: list, errors: list):
+
+    client = app.test_client()
+
+    for index in range(requests):
+        path = paths[(offset + index) % len(paths)]
+
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - started)
+
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+def run(workers: int, requests: int) -> dict:
+
+    latencies = []
+    errors = []
+
+    threads = [
+        threading.Thread(target=worker, args=(requests, offset, latencies, errors))
+        for offset in range(workers)
+    ]
+
+    started = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    levels = [int(argument) for argument in sys.argv[2:]] or [1, 2, 4, 8, 16, 32]
+
+    response_cache.max_entries = 0
+
+    with app.app_context():
+        pool = db.engine.pool
+
+    instrumented = isinstance(pool, InstrumentedQueuePool)
+    empty = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0, "overflow": "-"}
+
+    print(f"{'workers':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'wait avg ms':>12} {'wait max ms':>12} {'overflow':>9}")
+
+    for workers in levels:
+
+        before = pool.stats() if instrumented else empty
+        result = run(workers, requests)
+        after = pool.stats() if instrumented else empty
+
+        checkouts = after["checkouts"] - before["checkouts"]
+        wait_total = after["wait_total"] - before["wait_total"]
+
+        print(f"{workers:>8} {result['rps']:>9.0f} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+              f"{result['p99']:>8.2f} {result['errors']:>7} "
+              f"{(wait_total / checkouts * 1000 if checkouts else 0):>12.3f} "
+              f"{after['wait_max'] * 1000:>12.3f} {after['overflow']:>9}")
+
+    print(pool.stats() if instrumented else f"{type(pool).__name__}: {pool.status()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+    Benchmark
+    seed a database with generated users, orders and offers
+"""
+
+# global imports
+from sqlalchemy.orm import Session
+
+# local imports
+from main.bulk import bulk_load, reset_sequence
+from main.generator import GeneratorConfig, load_pools, generate_users, generate_orders, generate_offers
+from main.models import User, Order, Offer
+from main.read_models import rebuild_read_models
+
+
+def seed(session: Session, config: GeneratorConfig) -> dict:
+    """ Insert the generated rows and rebuild the read models, in one transaction
+
+    Returns the number of rows of each table.
+    """
+
+    pools = load_pools()
+
+    with session.begin():
+        sizes = {
+            "users": bulk_load(session, User, generate_users(config, pools)),
+            "orders": bulk_load(session, Order, generate_orders(config, pools)),
+            "offers": bulk_load(session, Offer, generate_offers(config, pools)),
+        }
+
+        for model in [User, Order, Offer]:
+            reset_sequence(session, model)
+
+        rebuild_read_models(session)
+
+    return sizes
@@ -0,0 +1,131 @@
+"""
+    Benchmark
+    application startup, every run in a fresh interpreter
+
+    python -m benchmarks.startup [--runs N] [--db URI] [--out FILE]
+
+    Each scenario starts a new python process, the way a worker boots or
+    a test session starts, and reports the median and min of the phases
+    it times. The first request goes to /users/count on --db, a SQLite
+    file by default, created before the runs.
+"""
+
+# global imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+default_db = Path(__file__).resolve().parent / "startup.sqlite3"
+
+# the phases print their times in ms, one json object on the last line
+probe = """
+import json, time
+started = time.perf_counter()
+times = {}
+
+def mark(name):
+    global started
+    now = time.perf_counter()
+    times[name] = (now - started) * 1000
+    started = now
+
+%s
+
+print(json.dumps(times))
+"""
+
+scenarios = {
+    # what `import app` costs a script that only needs create_app or the models
+    "import app": """
+import app
+mark("import")
+""",
+    # a test session building its own app
+    "create_app": """
+from app import create_app
+mark("import")
+test_app = create_app()
+mark("create")
+""",
+    # a worker booting and serving its first request
+    "first request": """
+from app import create_app
+mark("import")
+the_app = create_app()
+mark("create")
+the_app.test_client().get("/users/count")
+mark("first request")
+""",
+}
+
+
+def run(code: str, environ: dict) -> dict:
+
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", probe % code],
+        capture_output=True, text=True, check=True, env=environ
+    ).stdout
+    elapsed = (time.perf_counter() - started) * 1000
+
+    return {**json.loads(output.strip().splitlines()[-1]), "process": elapsed}
+
+
+def summary(runs: list) -> dict:
+    return {
+        phase: {
+            "median_ms": round(statistics.median(run[phase] for run in runs), 1),
+            "min_ms": round(min(run[phase] for run in runs), 1),
+        }
+        for phase in runs[0]
+    }
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Time application startup in fresh interpreters")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db", default=f"sqlite:///{default_db}", help="database URI, tables created if missing")
+    parser.add_argument("--out", default="benchmarks/startup.json")
+
+    return parser.parse_args()
+
+
+def main():
+
+    args = parse_args()
+    environ = {**os.environ, "DB_URI": args.db}
+
+    subprocess.run(
+        [sys.executable, "-c", "from app import create_app; from main.models import db\n"
+                               "with create_app().app_context(): db.create_all()"],
+        check=True, env=environ
+    )
+
+    results = {}
+
+    for name, code in scenarios.items():
+        runs = [run(code, environ) for _ in range(args.runs)]
+        results[name] = summary(runs)
+
+        phases = ", ".join(f"{phase} {times['median_ms']:.0f} ms" for phase, times in results[name].items())
+        print(f"{name:<14} {phases}")
+
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "results": results,
+    }
+
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"written {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+    Benchmark
+    every route of the users, orders and offers blueprints under concurrent clients
+
+    python -m benchmarks.suite [--db URI] [--users N] [--orders-per-customer MIN-MAX]
+                               [--offers-per-order MIN-MAX] [--workers 1,8,32]
+                               [--requests N] [--url URL] [--cache] [--no-seed] [--out FILE]
+
+    The app is created with DB_URI=--db, a SQLite file by default, which
+    is dropped, re-created and seeded by main.generator before the run
+    (--no-seed expects a database generated with the same options). With
+    --url the clients call a running server instead of the app in process
+    (the server must use the same database). Latency percentiles and
+    throughput per route and worker count go to --out as JSON.
+"""
+
+# global imports
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+default_db = Path(__file__).resolve().parent / "bench.sqlite3"
+
+
+class Scenario:
+    """ One route, with the request it sends built from a random generator """
+
+    def __init__(self, name: str, method: str, path, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+    def request(self, generator: random.Random, sizes: dict) -> tuple:
+        path = self.path(generator, sizes) if callable(self.path) else self.path
+        body = self.body(generator, sizes) if self.body is not None else None
+        return path, body
+
+
+def pk(name: str):
+    return lambda generator, sizes: generator.randint(1, sizes[name])
+
+
+def customer(generator, sizes):
+    config = sizes["config"]
+    return config.customer_id(generator.randint(1, config.customers))
+
+
+def executor(generator, sizes):
+    config = sizes["config"]
+    return config.executor_id(generator.randint(1, config.executors))
+
+
+# shared among workers, every delete targets a different row
+delete_counters = {}
+
+
+def next_delete(name: str):
+    def path(generator, sizes):
+        counter = delete_counters.setdefault(name, itertools.count(sizes[name], -1))
+        return f"/{name}/{max(next(counter), 1)}"
+    return path
+
+
+unique_phones = itertools.count(8_000_000_000)
+
+
+def new_user(generator, sizes):
+    return {
+        "first_name": "Hudson",
+        "last_name": "Pauloh",
+        "age": generator.randint(18, 65),
+        "email": "bench@mymail.com",
+        "role": generator.choice(["customer", "executor"]),
+        "phone": str(next(unique_phones)),
+    }
+
+
+def new_order(generator, sizes):
+    end_date = datetime.date.today() + datetime.timedelta(days=generator.randint(1, 365))
+    return {
+        "description": "Встретить тетю на вокзале с табличкой и отвезти домой",
+        "end_date": end_date.strftime("%d.%m.%Y"),
+        "address": "4759 William Haven Apt. 194",
+        "price": generator.randrange(100, 10_000),
+        "customer_id": customer(generator, sizes),
+        "executor_id": executor(generator, sizes),
+    }
+
+
+def new_offer(generator, sizes):
+    return {"order_id": pk("orders")(generator, sizes), "executor_id": executor(generator, sizes)}
+
+
+scenarios = [
+    Scenario("users list", "GET", lambda g, s: f"/users/?limit=20&offset={g.randrange(100)}"),
+    Scenario("users list by age", "GET", "/users/?limit=20&order_by=age"),
+    Scenario("users list by orders", "GET", "/users/?limit=20&filter_by=customer&order_by=owner"),
+    Scenario("user by pk", "GET", lambda g, s: f"/users/{pk('users')(g, s)}"),
+    Scenario("users count", "GET", "/users/count?filter_by=executor"),
+    Scenario("users export", "GET", "/users/export"),
+
+    Scenario("orders list", "GET", lambda g, s: f"/orders/?limit=20&offset={g.randrange(100)}"),
+    Scenario("orders list by price", "GET", "/orders/?limit=20&order_by=price"),
+    Scenario("orders of customer", "GET", lambda g, s: f"/orders/?filter_by=customer&user_pk={customer(g, s)}"),
+    Scenario("order by pk", "GET", lambda g, s: f"/orders/{pk('orders')(g, s)}"),
+    Scenario("orders price range", "GET", "/orders/?limit=20&price_min=1000&price_max=2000&order_by=price"),
+    Scenario("orders count", "GET", "/orders/count"),
+    Scenario("orders count by start", "GET", "/orders/count?start_from=01.01.2021&start_to=31.12.2021"),
+    Scenario("orders export", "GET", "/orders/export"),
+
+    Scenario("offers list", "GET", lambda g, s: f"/offers/?limit=20&offset={g.randrange(100)}"),
+    Scenario("offers list by user", "GET", "/offers/?limit=20&order_by=user"),
+    Scenario("offers of order", "GET", lambda g, s: f"/offers/?filter_by=order&order_pk={pk('orders')(g, s)}"),
+    Scenario("offers approved", "GET", "/offers/?limit=20&filter_by=approved"),
+    Scenario("offer by pk", "GET", lambda g, s: f"/offers/{pk('offers')(g, s)}"),
+    Scenario("offers count", "GET", "/offers/count"),
+    Scenario("offers export", "GET", "/offers/export"),
+
+    Scenario("add user", "POST", "/users/", new_user),
+    Scenario("add users batch", "POST", "/users/batch", lambda g, s: [new_user(g, s) for _ in range(10)]),
+    Scenario("update user", "PUT", lambda g, s: f"/users/{pk('users')(g, s)}", lambda g, s: {"age": g.randint(18, 65)}),
+
+    Scenario("add order", "POST", "/orders/", new_order),
+    Scenario("add orders batch", "POST", "/orders/batch", lambda g, s: [new_order(g, s) for _ in range(10)]),
+    Scenario("update order", "PUT", lambda g, s: f"/orders/{pk('orders')(g, s)}",
+             lambda g, s: {"price": g.randrange(100, 10_000)}),
+
+    Scenario("add offer", "POST", "/offers/", new_offer),
+    Scenario("add offers batch", "POST", "/offers/batch", lambda g, s: [new_offer(g, s) for _ in range(10)]),
+    Scenario("update offer", "PUT", lambda g, s: f"/offers/{pk('offers')(g, s)}",
+             lambda g, s: {"executor_id": executor(g, s)}),
+
+    Scenario("delete offer", "DELETE", next_delete("offers")),
+    Scenario("delete order", "DELETE", next_delete("orders")),
+    Scenario("delete user", "DELETE", next_delete("users")),
+]
+
+
+class AppClient:
+    """ Calls the app in process through the flask test client """
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def call(self, method: str, path: str, body) -> tuple:
+        response = self._client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """ Calls a running server over one keep-alive connection """
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self._prefix = parts.path.rstrip("/")
+        self._connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def call(self, method: str, path: str, body) -> tuple:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        self._connection.request(method, self._prefix + path, body=payload, headers=headers)
+        response = self._connection.getresponse()
+        return response.status, response.read()
+
+
+def is_failed(status: int, data: bytes) -> bool:
+    """ Writes answer 200 with {"status": "error"} when they are refused """
+
+    if status != 200:
+        return True
+
+    return data.startswith(b"{") and b'"status":"error"' in data.replace(b" ", b"")
+
+
+def run(scenario: Scenario, make_client, sizes: dict, workers: int, requests: int, seed_value: int) -> dict:
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def worker(index: int):
+        client = make_client()
+        generator = random.Random(f"{seed_value}-{scenario.name}-{workers}-{index}")
+        own_latencies = []
+        own_failures = 0
+
+        for _ in range(requests):
+            path, body = scenario.request(generator, sizes)
+
+            started = time.perf_counter()
+            status, data = client.call(scenario.method, path, body)
+            own_latencies.append(time.perf_counter() - started)
+
+            own_failures += is_failed(status, data)
+
+        with lock:
+            latencies.extend(own_latencies)
+            failures.append(own_failures)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+
+    started = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+    return {
+        "route": scenario.name,
+        "method": scenario.method,
+        "workers": workers,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+        "failed": sum(failures),
+    }
+
+
+def int_range(text: str) -> tuple:
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Benchmark every route under concurrent clients")
+    parser.add_argument("--db", default=f"sqlite:///{default_db}", help="database URI, dropped and seeded")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--orders-per-customer", type=int_range, default=(5, 15), metavar="MIN-MAX")
+    parser.add_argument("--offers-per-order", type=int_range, default=(0, 4), metavar="MIN-MAX")
+    parser.add_argument("--seed", type=int, default=16)
+    parser.add_argument("--workers", default="1,8,32", help="comma separated worker counts")
+    parser.add_argument("--requests", type=int, default=50, help="requests per worker")
+    parser.add_argument("--routes", default="", help="only routes whose name contains this")
+    parser.add_argument("--url", default=None, help="base URL of a running server")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--no-seed", action="store_true", help="use the database as it is")
+    parser.add_argument("--out", default="benchmarks/results.json")
+
+    return parser.parse_args()
+
+
+def main():
+
+    args = parse_args()
+    os.environ["DB_URI"] = args.db
+
+    from app import create_app
+    from grm import response_cache
+    from main.generator import GeneratorConfig
+    from main.models import db, User, Order, Offer
+    from benchmarks.seed import seed
+
+    app = create_app()
+
+    if not args.cache:
+        response_cache.max_entries = 0
+
+    config = GeneratorConfig(
+        users=args.users,
+        orders_per_customer=args.orders_per_customer,
+        offers_per_order=args.offers_per_order,
+        seed=args.seed,
+    )
+
+    with app.app_context():
+
+        if args.no_seed:
+            sizes = {
+                "users": User.query.count(),
+                "orders": Order.query.count(),
+                "offers": Offer.query.count(),
+            }
+        else:
+            started = time.perf_counter()
+
+            db.drop_all()
+            db.create_all()
+            sizes = seed(db.session, config)
+
+            print(f"seeded {sizes} in {time.perf_counter() - started:.1f} s")
+
+        db.session.remove()
+
+    def make_client():
+        return HttpClient(args.url) if args.url else AppClient(app)
+
+    levels = [int(workers) for workers in args.workers.split(",")]
+    results = []
+    targets = {**sizes, "config": config}
+
+    print(f"{'route':<22} {'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}")
+
+    for scenario in scenarios:
+
+        if args.routes not in scenario.name:
+            continue
+
+        for workers in levels:
+            result = run(scenario, make_client, targets, workers, args.requests, args.seed)
+            results.append(result)
+
+            print(f"{result['route']:<22} {workers:>7} {result['rps']:>9.0f} {result['p50_ms']:>9.2f} "
+                  f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['failed']:>7}")
+
+    report = {
+        "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split("@")[-1],
+        "target": args.url or "in process",
+        "sizes": sizes,
+        "seed": args.seed,
+        "workers": levels,
+        "requests_per_worker": args.requests,
+        "cache": args.cache,
+        "results": results,
+    }
+
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"written {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,12 @@
     grm package
 """
 
-from .adapters import BaseAdapter
-from .serializers import to_dict_from_alchemy_model
+from .adapters import BaseAdapter, BaseExportAdapter, batch_failed, flush_each
+from .serializers import to_dict_from_alchemy_model, get_serializer
+from .pagination import encode_cursor, decode_cursor, order_by_keys, seek, next_cursor
+from .cache import ResponseCache, response_cache
+from .loader import BatchLoader, loader
+from .pool import InstrumentedQueuePool
+from .aio import AsyncReadApp
+from .metrics import Metrics, metrics
+from .replica import ReplicaRouter, RoutingSQLAlchemy, replica
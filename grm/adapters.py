@@ -5,12 +5,200 @@
 
 
 # global imports
-from flask import jsonify
+import csv
+import io
+
+from flask import jsonify, json, current_app, stream_with_context
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query, Session
+
+# local imports
+from .cache import response_cache
+from .metrics import metrics
+from .replica import replica
 
 
 class BaseAdapter:
 
     _data = None
+    _payload = None
+    _cache_key = None
+
+    # read-only adapters query the replica, when there is one
+    read_only = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # adapters do all their work in __init__
+        if "__init__" in cls.__dict__:
+            init = cls.__dict__["__init__"]
+
+            if cls.read_only:
+                init = replica.reading()(init)
+
+            cls.__init__ = metrics.timed("adapter")(init)
 
+    def _from_cache(self, namespace, *args) -> bool:
+        """ Look up the response for the normalized adapter arguments
+
+        Replica and primary reads are cached apart, a lagging replica body
+        is never served as primary data. Clients reading their own writes
+        skip the cache: it may hold a body older than their write.
+        """
+
+        target = replica.target()
+
+        if target == "sticky":
+            self._cache_key = None
+            return False
+
+        self._cache_key = response_cache.key(namespace, type(self).__name__, target, *args)
+        self._payload = response_cache.get(self._cache_key)
+        return self._payload is not None
+
+    @metrics.timed("serialize")
     def jsonify(self):
-        return jsonify(self._data)
+
+        if self._payload is not None:
+            return current_app.response_class(self._payload, mimetype=current_app.config["JSONIFY_MIMETYPE"])
+
+        backend = current_app.extensions.get("json_backend")
+        response = backend.response(self._data) if backend is not None else jsonify(self._data)
+
+        if self._cache_key is not None:
+            response_cache.set(self._cache_key, response.get_data())
+
+        return response
+
+
+class BaseExportAdapter(BaseAdapter):
+    """ Streams every row of a query as NDJSON or CSV
+
+    Rows are read through a server side cursor chunk_size at a time, so
+    memory stays flat whatever the table size.
+    """
+
+    format_list = ["ndjson", "csv"]
+    mimetypes = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+    chunk_size = 1000
+
+    def __init__(self, query: Query, to_dict, export_format="ndjson"):
+
+        if export_format not in self.format_list:
+            export_format = self.format_list[0]
+
+        self._query = query
+        self._to_dict = to_dict
+        self._format = export_format
+
+    def _rows(self):
+
+        # the view has already removed the session the query was built on,
+        # nothing else will give its connection back to the pool
+        try:
+            for row in self._query.yield_per(self.chunk_size):
+                yield self._to_dict(row)
+        finally:
+            self._query.session.close()
+
+    def _ndjson(self):
+
+        backend = current_app.extensions.get("json_backend")
+        dumps = backend.dumps if backend is not None else \
+            (lambda data: json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+        chunk = []
+        for row in self._rows():
+            chunk.append(dumps(row))
+            if len(chunk) == self.chunk_size:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+    def _csv(self):
+
+        encoder = current_app.json_encoder()
+        buffer = io.StringIO()
+        writer = None
+
+        for count, row in enumerate(self._rows(), start=1):
+
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+                writer.writeheader()
+
+            writer.writerow({
+                key: value if value is None or isinstance(value, (str, int, float)) else encoder.default(value)
+                for key, value in row.items()
+            })
+
+            if count % self.chunk_size == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def stream(self):
+
+        lines = self._ndjson() if self._format == "ndjson" else self._csv()
+
+        return current_app.response_class(
+            stream_with_context(lines),
+            mimetype=self.mimetypes[self._format]
+        )
+
+
+def batch_failed(items: list, message: str = "Not saved, the batch was rolled back") -> list:
+    """ Mark items that passed the checks as failed after a rollback """
+
+    return [
+        {**item, "status": "error", "message": message, "id": None}
+        if item["status"] == "ok" else item
+        for item in items
+    ]
+
+
+def flush_each(session: Session, objects: dict, items: list) -> dict:
+    """ Flush the objects of a batch, each in its own savepoint if the batch fails
+
+    objects maps item indexes to new model objects. The whole batch is
+    flushed at once first. If the database refuses it, every object is
+    flushed again in its own savepoint: an object the database refuses is
+    rolled back alone and its item marked failed, the others get their ids.
+    Returns the objects that were flushed, by index.
+    """
+
+    try:
+        with session.begin_nested():
+            session.add_all(objects.values())
+
+    except SQLAlchemyError:
+        pass
+
+    else:
+        for index, model_object in objects.items():
+            items[index]["id"] = model_object.id
+
+        return dict(objects)
+
+    flushed = {}
+
+    for index, model_object in objects.items():
+
+        try:
+            with session.begin_nested():
+                session.add(model_object)
+
+        except SQLAlchemyError as exception:
+            items[index] = {"status": "error", "message": str(exception), "id": None}
+            continue
+
+        items[index]["id"] = model_object.id
+        flushed[index] = model_object
+
+    return flushed
@@ -0,0 +1,213 @@
+"""
+    GRM package
+    ASGI serving with async database reads
+"""
+from __future__ import annotations
+
+# global imports
+import io
+import sys
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
+from sqlalchemy.util import greenlet_spawn
+from werkzeug.exceptions import HTTPException
+
+# local imports
+from .replica import replica
+
+
+# sync driver -> async driver of the same database
+async_drivers = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+# engine options that only apply to a queue pool
+pool_options = ["pool_size", "max_overflow", "pool_timeout"]
+
+def async_database_uri(uri: str) -> str:
+    """ The same database URI on the async driver """
+
+    url = make_url(uri)
+    return str(url.set(drivername=async_drivers.get(url.drivername, url.drivername)))
+
+
+def environ_from_scope(scope: dict, body: bytes) -> dict:
+    """ WSGI environ of an ASGI http scope """
+
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+
+        if name not in ["CONTENT_TYPE", "CONTENT_LENGTH"]:
+            name = f"HTTP_{name}"
+
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+
+    return environ
+
+
+class AsyncReadApp:
+    """ ASGI application serving the listed endpoints on an async driver
+
+    GET and HEAD requests routed to one of endpoints run the regular Flask
+    view, but the engine every query is routed to, primary or replica, is
+    swapped for an AsyncEngine of the same database and its queries await
+    the driver on the event loop, the way AsyncSession.run_sync does.
+    Nothing else changes: same URLs, same views, same JSON, same replica
+    routing. All other requests go to the WSGI app in a thread.
+
+    application = AsyncReadApp(app, db, ["bp_main.bp_users.index_all_users"])
+    """
+
+    def __init__(self, app: Flask, db: SQLAlchemy, endpoints):
+        from asgiref.wsgi import WsgiToAsgi
+
+        self.app = app
+        self.db = db
+        self.endpoints = frozenset(endpoints)
+
+        self._wsgi = WsgiToAsgi(app)
+        self._engines = None
+        self._substitutes = None
+
+    def _create_engine(self, uri: str):
+        """ AsyncEngine for the sync database URI, with the app engine options """
+
+        # the async stack is only imported by the apps that serve ASGI
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        uri = async_database_uri(uri)
+        options = dict(self.app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+
+        # asyncio needs its own queue pool class, sqlite drivers pool nothing
+        options.pop("poolclass", None)
+        if make_url(uri).get_backend_name() == "sqlite":
+            for name in pool_options:
+                options.pop(name, None)
+
+        return create_async_engine(uri, **options)
+
+    @property
+    def engines(self) -> dict:
+        """ AsyncEngine of every bind by its sync engine, created on first use from the app config """
+
+        if self._engines is None:
+            config = self.app.config
+
+            uri = config.get("SQLALCHEMY_ASYNC_DATABASE_URI") or config["SQLALCHEMY_DATABASE_URI"]
+            engines = {self.db.get_engine(self.app): self._create_engine(uri)}
+
+            for bind_key, uri in (config.get("SQLALCHEMY_BINDS") or {}).items():
+                engines[self.db.get_engine(self.app, bind=bind_key)] = self._create_engine(uri)
+
+            self._engines = engines
+
+        return self._engines
+
+    @property
+    def substitutes(self) -> dict:
+        """ Sync engine of every bind -> the sync facade of its AsyncEngine """
+
+        if self._substitutes is None:
+            self._substitutes = {engine: async_engine.sync_engine for engine, async_engine in self.engines.items()}
+
+        return self._substitutes
+
+    @property
+    def engine(self):
+        """ AsyncEngine of the primary database """
+
+        return self.engines[self.db.get_engine(self.app)]
+
+    def _is_async(self, environ: dict) -> bool:
+
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False
+
+        return endpoint in self.endpoints
+
+    def _call_wsgi(self, environ: dict) -> tuple:
+        """ Run the WSGI app in the current greenlet, queries on the async engines """
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+
+        with replica.substituting(self.substitutes):
+            iterable = self.app.wsgi_app(environ, start_response)
+
+            try:
+                body = b"".join(iterable)
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+
+        return response["status"], response["headers"], body
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        if scope["type"] != "http" or scope["method"] not in ["GET", "HEAD"]:
+            return await self._wsgi(scope, receive, send)
+
+        environ = environ_from_scope(scope, b"")
+
+        if not self._is_async(environ):
+            return await self._wsgi(scope, receive, send)
+
+        status, headers, body = await greenlet_spawn(self._call_wsgi, environ)
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": b"" if scope["method"] == "HEAD" else body,
+        })
+
+    async def _lifespan(self, receive, send):
+
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+
+            elif message["type"] == "lifespan.shutdown":
+                for async_engine in (self._engines or {}).values():
+                    await async_engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,160 @@
+"""
+    GRM package
+    in-process response cache
+"""
+from __future__ import annotations
+
+# global imports
+import contextvars
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from flask import Flask
+
+
+# database change versions the current response is built for, see versioned()
+_versions = contextvars.ContextVar("grm_cache_versions", default=None)
+
+
+class ResponseCache:
+    """ LRU cache of serialized responses with a TTL and a byte budget
+
+    Entries are grouped in namespaces (one per entity). invalidate() drops
+    a namespace and bumps its generation, so a response computed before
+    the write and stored after it is never cached. Inside versioned() the
+    keys also carry the database change versions.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._namespaces: defaultdict = defaultdict(set)
+        self._generations: defaultdict = defaultdict(int)
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app: Flask):
+        self.max_entries = app.config.get("CACHE_MAX_ENTRIES", self.max_entries)
+        self.ttl = app.config.get("CACHE_TTL", self.ttl)
+        self.max_bytes = app.config.get("CACHE_MAX_BYTES", self.max_bytes)
+        app.extensions["grm_cache"] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0 and self.max_bytes > 0
+
+    @contextmanager
+    def versioned(self, versions):
+        """ Key the entries of the block by versions as well
+
+        The generations only see the writes of this process. The change
+        versions read from the database see every worker's writes, so an
+        entry cached before another worker wrote is not served after it.
+        """
+
+        token = _versions.set(versions)
+        try:
+            yield
+        finally:
+            _versions.reset(token)
+
+    def key(self, namespace: str, *args) -> tuple:
+        """ Cache key of normalized adapter arguments """
+
+        return namespace, self._generations[namespace], _versions.get(), *args
+
+    def get(self, key: tuple) -> bytes | None:
+
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, payload = entry
+
+            if expires < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, key: tuple, payload: bytes):
+
+        if not self.enabled or len(payload) > self.max_bytes:
+            return
+
+        namespace, generation = key[0], key[1]
+
+        with self._lock:
+
+            if self._generations[namespace] != generation:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, payload)
+            self._namespaces[namespace].add(key)
+            self._bytes += len(payload)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *namespaces: str):
+
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] += 1
+                for key in list(self._namespaces.pop(namespace, ())):
+                    self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: tuple):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+        self._namespaces[key[0]].discard(key)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,87 @@
+"""
+    GRM package
+    batched primary key loader
+"""
+from __future__ import annotations
+
+# global imports
+from flask import g, has_app_context
+from sqlalchemy import inspect
+
+
+class BatchLoader:
+    """ Loads rows of one mapped class by primary key, one IN query per batch
+
+    Ids queued with want() are fetched together with the next load() or
+    get(), and every row (or miss) is memoized for the life of the loader.
+
+    users = loader(User)
+    users.want(customer_id, executor_id)
+    customer, executor = users.get(customer_id), users.get(executor_id)
+    """
+
+    def __init__(self, model_class):
+        self._model = model_class
+        mapper = inspect(model_class)
+        self._key = mapper.get_property_by_column(mapper.primary_key[0]).key
+        self._rows: dict = {}
+        self._pending: set = set()
+
+    def want(self, *ids):
+        """ Queue ids for the next query, None is ignored """
+
+        self._pending.update(pk for pk in ids if pk is not None)
+
+    def load(self, *ids) -> dict:
+        """ Rows by id for ids plus everything queued, missing ids map to None """
+
+        self.want(*ids)
+
+        # rows of a closed session are detached and expired, fetch them again
+        missing = {
+            pk for pk in self._pending
+            if pk not in self._rows or (self._rows[pk] is not None and inspect(self._rows[pk]).detached)
+        }
+        self._pending.clear()
+
+        if missing:
+            column = getattr(self._model, self._key)
+            found = {getattr(row, self._key): row for row in self._model.query.filter(column.in_(missing))}
+            for pk in missing:
+                self._rows[pk] = found.get(pk)
+
+        return {pk: self._rows[pk] for pk in ids if pk is not None}
+
+    def get(self, pk):
+        """ Row for pk or None """
+
+        if pk is None:
+            return None
+
+        return self.load(pk)[pk]
+
+    def clear(self):
+        self._rows.clear()
+        self._pending.clear()
+
+
+def loader(model_class) -> BatchLoader:
+    """ The BatchLoader of model_class for the current app context
+
+    The loaders live in flask.g, so they last as long as the app context.
+    Every view runs its adapter in its own app_context(), so in a request
+    a loader serves one adapter call: its batches and memo do not reach the
+    next adapter. The session is removed with the app context as well, so
+    rows kept longer would only come back detached.
+    """
+
+    if not has_app_context():
+        return BatchLoader(model_class)
+
+    loaders = g.setdefault("grm_loaders", {})
+    batch_loader = loaders.get(model_class)
+
+    if batch_loader is None:
+        batch_loader = loaders[model_class] = BatchLoader(model_class)
+
+    return batch_loader
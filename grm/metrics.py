@@ -0,0 +1,209 @@
+"""
+    GRM package
+    per-request metrics in the Prometheus text format
+"""
+from __future__ import annotations
+
+# global imports
+import threading
+import time
+from functools import wraps
+
+from flask import Flask, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# histogram bounds, times are in seconds
+time_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+query_buckets = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+byte_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """ Cumulative histogram with one series per label values """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple, labels: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+
+        self._lock = threading.Lock()
+        self._series: dict = {}
+
+    def observe(self, value: float, *label_values: str):
+
+        with self._lock:
+            series = self._series.get(label_values)
+
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                labels = ",".join(
+                    f'{label}="{escape(value)}"' for label, value in zip(self.labels, label_values)
+                )
+
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+
+        return lines
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    """ Query counts, SQL, adapter and serialization time and response size per route
+
+    Every SQL statement run by any engine inside a request is counted
+    against the route of that request. Adapter construction and
+    jsonify() report through timed().
+    """
+
+    environ_key = "grm.metrics"
+
+    def __init__(self):
+        self.enabled = True
+
+        labels = ("method", "route")
+
+        self.histograms = {
+            "request": Histogram("grm_request_seconds", "Time spent handling the request", time_buckets, labels),
+            "adapter": Histogram("grm_adapter_seconds", "Time spent constructing adapters, SQL included", time_buckets, labels),
+            "sql": Histogram("grm_sql_seconds", "Time spent executing SQL", time_buckets, labels),
+            "queries": Histogram("grm_sql_queries", "SQL statements executed", query_buckets, labels),
+            "serialize": Histogram("grm_serialize_seconds", "Time spent serializing the response", time_buckets, labels),
+            "bytes": Histogram("grm_response_bytes", "Response body size", byte_buckets, labels),
+        }
+
+    def init_app(self, app: Flask):
+        self.enabled = app.config.get("METRICS_ENABLED", self.enabled)
+        app.extensions["grm_metrics"] = self
+
+        if not event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _current(self) -> dict | None:
+        """ Counters of the current request """
+
+        if not self.enabled or not has_request_context():
+            return None
+
+        return request.environ.get(self.environ_key)
+
+    def timed(self, name: str):
+        """ Decorator adding the run time of a function to the request counter name
+
+        Nested calls are counted once, by the outermost one.
+        """
+
+        def decorator(function):
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+
+                current = self._current()
+
+                if current is None or current["depth"].get(name):
+                    return function(*args, **kwargs)
+
+                current["depth"][name] = True
+                started = time.perf_counter()
+
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    current[name] += time.perf_counter() - started
+                    current["depth"][name] = False
+
+            return wrapper
+
+        return decorator
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+
+        if self._current() is not None:
+            conn.info.setdefault("grm_query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+
+        started = conn.info.get("grm_query_started")
+
+        if not started:
+            return
+
+        elapsed = time.perf_counter() - started.pop()
+        current = self._current()
+
+        if current is not None:
+            current["sql"] += elapsed
+            current["queries"] += 1
+
+    def _before_request(self):
+
+        if self.enabled:
+            request.environ[self.environ_key] = {
+                "started": time.perf_counter(),
+                "adapter": 0.0,
+                "sql": 0.0,
+                "queries": 0,
+                "serialize": 0.0,
+                "depth": {},
+            }
+
+    def _after_request(self, response):
+
+        current = self._current()
+
+        if current is None:
+            return response
+
+        labels = request.method, request.url_rule.rule if request.url_rule is not None else "unmatched"
+        histograms = self.histograms
+
+        histograms["request"].observe(time.perf_counter() - current["started"], *labels)
+        histograms["adapter"].observe(current["adapter"], *labels)
+        histograms["sql"].observe(current["sql"], *labels)
+        histograms["queries"].observe(current["queries"], *labels)
+        histograms["serialize"].observe(current["serialize"], *labels)
+
+        # streamed responses have no length up front
+        if not response.is_streamed:
+            histograms["bytes"].observe(response.calculate_content_length() or 0, *labels)
+
+        return response
+
+    def render(self) -> str:
+
+        lines = []
+        for histogram in self.histograms.values():
+            lines.extend(histogram.render())
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,130 @@
+"""
+    GRM package
+    keyset (cursor) pagination
+"""
+from __future__ import annotations
+
+# global imports
+import base64
+import binascii
+import datetime
+import json
+
+from sqlalchemy import and_, or_, desc, false
+from sqlalchemy.orm import Query
+
+
+def _dump_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return datetime.date.fromisoformat(value["d"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(values) -> str:
+    """ Encode the last sort key values into an opaque cursor """
+
+    payload = json.dumps([_dump_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list | None:
+    """ Decode a cursor, None if it is empty or corrupt """
+
+    if not cursor:
+        return None
+
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload.decode("utf-8"))
+        if not isinstance(values, list):
+            return None
+        return [_load_value(value) for value in values]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+
+
+def _matches(key, value) -> bool:
+    """ The cursor value fits the python type of the sort key """
+
+    if value is None:
+        return True
+
+    try:
+        python_type = key.type.python_type
+    except (AttributeError, NotImplementedError):
+        return True
+
+    if python_type is float:
+        python_type = (int, float)
+
+    return isinstance(value, python_type)
+
+
+def _nulls_large(query: Query) -> bool:
+    """ NULL sorts after every value, as on Postgres; SQLite sorts it first """
+
+    return query.session.get_bind().dialect.name not in ("sqlite", "mysql")
+
+
+def _after(key, value, descending: bool, nulls_after: bool):
+    """ Condition for rows strictly after value in the order of key, None if there are none """
+
+    if value is None:
+        return key.isnot(None) if not nulls_after else None
+
+    after = key < value if descending else key > value
+    return or_(after, key.is_(None)) if nulls_after else after
+
+
+def order_by_keys(query: Query, sort_keys: list, descending: bool) -> Query:
+    """ Order the query by all sort keys in one direction
+
+    NULLs keep the database's own place, so indexes still give the order.
+    """
+
+    return query.order_by(*[desc(key) if descending else key for key in sort_keys])
+
+
+def seek(query: Query, sort_keys: list, descending: bool, cursor: str) -> Query:
+    """ Keyset page: order by the sort keys and skip everything up to the cursor
+
+    The last sort key must be unique (the primary key), the sort key values
+    are appended to every row so that next_cursor() can read them back.
+    """
+
+    values = decode_cursor(cursor)
+
+    # a cursor of other sort keys is corrupt and starts from the first page
+    if values is not None and len(values) == len(sort_keys) and all(map(_matches, sort_keys, values)):
+        nulls_after = _nulls_large(query) != descending
+        conditions = []
+        for index, key in enumerate(sort_keys):
+            after = _after(key, values[index], descending, nulls_after)
+            if after is None:
+                continue
+            equal = [sort_keys[i].is_(None) if values[i] is None else sort_keys[i] == values[i] for i in range(index)]
+            conditions.append(and_(*equal, after))
+        query = query.filter(or_(*conditions)) if conditions else query.filter(false())
+
+    return order_by_keys(query, sort_keys, descending).add_columns(*sort_keys)
+
+
+def next_cursor(rows: list, sort_keys: list, limit: int) -> str | None:
+    """ Cursor of the page following rows fetched by seek(), None on the last page """
+
+    if len(rows) < limit:
+        return None
+
+    return encode_cursor(rows[-1][-len(sort_keys):])
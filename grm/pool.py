@@ -0,0 +1,76 @@
+"""
+    GRM package
+    instrumented connection pool
+"""
+from __future__ import annotations
+
+# global imports
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """ QueuePool that counts checkouts and measures how long they wait
+
+    The wait of a checkout is the time spent in the pool until a
+    connection is handed out, including opening a new one for overflow.
+
+    create_engine(url, poolclass=InstrumentedQueuePool, pool_size=5)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+
+    def _create_connection(self):
+
+        connection = super()._create_connection()
+
+        with self._stats_lock:
+            self.connects += 1
+
+        return connection
+
+    def stats(self) -> dict:
+
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow,
+                "timeout": self._timeout,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_total": round(self.wait_total, 6),
+                "wait_avg": round(self.wait_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_max": round(self.wait_max, 6),
+            }
@@ -0,0 +1,169 @@
+"""
+    GRM package
+    read replica routing
+"""
+from __future__ import annotations
+
+# global imports
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Flask, request, current_app, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+
+
+# set while a read-only adapter runs
+_reading = contextvars.ContextVar("grm_replica_reading", default=False)
+
+# sync engine -> engine to run on instead, set by the async read app
+_substitutes = contextvars.ContextVar("grm_replica_substitutes", default=None)
+
+
+class ReplicaRouter:
+    """ Sends the queries of read-only adapters to the replica bind
+
+    The replica is the SQLALCHEMY_BINDS entry named bind_key; without it
+    every query stays on the primary. A client that wrote gets a cookie
+    that keeps its reads on the primary for sticky_seconds, so it reads
+    its own writes whatever the replication lag is.
+    """
+
+    cookie_name = "grm_primary_until"
+
+    def __init__(self, bind_key: str = "replica", sticky_seconds: float = 5.0):
+        self.bind_key = bind_key
+        self.sticky_seconds = sticky_seconds
+
+        self._lock = threading.Lock()
+        self.replica_queries = 0
+        self.primary_queries = 0
+
+    def init_app(self, app: Flask):
+        self.sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", self.sticky_seconds)
+        app.extensions["grm_replica"] = self
+
+        app.after_request(self._after_request)
+
+    def configured(self, app: Flask | None = None) -> bool:
+        app = app or current_app
+        return self.bind_key in (app.config.get("SQLALCHEMY_BINDS") or {})
+
+    @contextmanager
+    def reading(self):
+        """ Route the queries of the block to the replica """
+
+        token = _reading.set(True)
+        try:
+            yield
+        finally:
+            _reading.reset(token)
+
+    @contextmanager
+    def substituting(self, engines: dict):
+        """ Run the queries of the block on engines[bind] instead of bind,
+        after the routing picked bind
+        """
+
+        token = _substitutes.set(engines)
+        try:
+            yield
+        finally:
+            _substitutes.reset(token)
+
+    def _is_sticky(self) -> bool:
+        """ The current client wrote less than sticky_seconds ago """
+
+        if not has_request_context():
+            return False
+
+        try:
+            return float(request.cookies.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def target(self, app: Flask | None = None) -> str:
+        """ Where the current reads go: "primary", "replica", or "sticky" for
+        a client that reads its own writes from the primary
+        """
+
+        if not _reading.get() or not self.configured(app):
+            return "primary"
+
+        return "sticky" if self._is_sticky() else "replica"
+
+    def read_bind(self, db: SQLAlchemy, app: Flask):
+        """ Replica engine for the current query, None to stay on the primary """
+
+        target = self.target(app)
+
+        if target == "primary":
+            return None
+
+        with self._lock:
+            if target == "sticky":
+                self.primary_queries += 1
+            else:
+                self.replica_queries += 1
+
+        return db.get_engine(app, bind=self.bind_key) if target == "replica" else None
+
+    def _after_request(self, response):
+
+        if request.method not in ("GET", "HEAD", "OPTIONS") and self.configured():
+            response.set_cookie(
+                self.cookie_name,
+                f"{time.time() + self.sticky_seconds:.3f}",
+                max_age=math.ceil(self.sticky_seconds),
+                httponly=True
+            )
+
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "configured": self.configured(),
+                "sticky_seconds": self.sticky_seconds,
+                "replica_queries": self.replica_queries,
+                "primary_queries": self.primary_queries,
+            }
+
+
+replica = ReplicaRouter()
+
+
+class RoutingSession(SignallingSession):
+    """ SignallingSession that asks the replica router for the bind of reads
+
+    Sessions created with an explicit bind keep it. Inside
+    replica.substituting() the chosen bind is swapped for its substitute.
+    """
+
+    def __init__(self, db, autocommit=False, autoflush=True, **options):
+        self._db = db
+        self._routed = options.get("bind") is None
+        super().__init__(db, autocommit=autocommit, autoflush=autoflush, **options)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+
+        # an explicit bind argument of the statement wins, as in Session.get_bind
+        if bind is None and self._routed:
+            bind = replica.read_bind(self._db, self.app)
+
+        if bind is None:
+            bind = super().get_bind(mapper, clause)
+
+        substitutes = _substitutes.get()
+
+        return substitutes.get(bind, bind) if substitutes else bind
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """ Flask-SQLAlchemy with RoutingSession sessions """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
@@ -2,12 +2,88 @@
     GRM package
     serializers
 """
+from __future__ import annotations
 
 # global imports
+from operator import attrgetter, itemgetter
+from typing import Callable
+
 from sqlalchemy import inspect
 
 
+_serializers: dict = {}
+
+
+def get_serializer(model_class, columns: list[str] | None = None, rename: dict | None = None) -> Callable:
+    """ Row to dict function for a mapped class
+
+    The mapper columns are resolved once per (class, columns, rename) and
+    the result is reused for every following row.
+
+    get_serializer(User, ["id", "first_name"], {"first_name": "name"})
+    """
+
+    key = (
+        model_class,
+        tuple(columns) if columns is not None else None,
+        tuple(sorted(rename.items())) if rename else None
+    )
+
+    serializer = _serializers.get(key)
+
+    if serializer is None:
+        serializer = _serializers[key] = _build_serializer(model_class, columns, rename or {})
+
+    return serializer
+
+
+def _build_serializer(model_class, columns: list[str] | None, rename: dict) -> Callable:
+
+    keys = [attr.key for attr in inspect(model_class).column_attrs]
+
+    if columns is not None:
+        unknown = set(columns) - set(keys)
+        if unknown:
+            raise ValueError(f"{model_class.__name__} has no columns {', '.join(sorted(unknown))}")
+        keys = list(columns)
+
+    if not keys:
+        # itemgetter() and attrgetter() need at least one name
+        return lambda model: None if model is None else {}
+
+    names = tuple(rename.get(key, key) for key in keys)
+
+    # loaded column values live in the instance __dict__, reading them from
+    # there skips the attribute instrumentation; expired or deferred columns
+    # are missing and go through the regular attribute access
+    fast_getter = itemgetter(*keys)
+    getter = attrgetter(*keys)
+
+    if len(keys) == 1:
+        name = names[0]
+
+        def serializer(model):
+            if model is None:
+                return None
+            try:
+                return {name: fast_getter(model.__dict__)}
+            except KeyError:
+                return {name: getter(model)}
+
+        return serializer
+
+    def serializer(model):
+        if model is None:
+            return None
+        try:
+            return dict(zip(names, fast_getter(model.__dict__)))
+        except KeyError:
+            return dict(zip(names, getter(model)))
+
+    return serializer
+
+
 def to_dict_from_alchemy_model(model):
     if model is None:
         return None
-    return {attr.key: getattr(model, attr.key) for attr in inspect(model).mapper.column_attrs}
+    return get_serializer(type(model))(model)
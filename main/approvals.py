@@ -0,0 +1,56 @@
+"""
+    Main blueprint
+    offers approval state
+"""
+from __future__ import annotations
+
+# global imports
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import exists, update
+from sqlalchemy.orm import Session
+
+# local imports
+from main.models import db, Order, Offer
+from main.versions import bump_versions
+
+
+def is_approved(order: Order | None, executor_id: int) -> bool:
+    """ Approval state of an offer of executor_id to order """
+
+    return order is not None and order.executor_id == executor_id
+
+
+def shift_approvals(session: Session, order_id: int, executor_id: int):
+    """ Recompute the offers of an order whose executor changed, inside the current transaction """
+
+    session.execute(
+        update(Offer)
+        .where(Offer.order_id == order_id)
+        .values(is_approved=Offer.executor_id == executor_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_approvals(session: Session):
+    """ Recalculate the approval state of all offers from the orders table """
+
+    session.execute(
+        update(Offer)
+        .values(is_approved=exists().where(Order.id == Offer.order_id, Order.executor_id == Offer.executor_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+@click.command("rebuild-approvals")
+@with_appcontext
+def rebuild_approvals_command():
+    """ Rebuild the offers approval state """
+
+    session: Session = db.session
+    with session():
+        rebuild_approvals(session)
+        bump_versions(session, "offers")
+        session.commit()
+
+    click.echo("Approvals rebuilt.")
@@ -0,0 +1,50 @@
+"""
+    Main blueprint
+    bulk loading
+"""
+
+# global imports
+from itertools import islice
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+# local imports
+from main.models import db
+
+
+CHUNK_SIZE = 1000
+
+
+def chunked(iterable, size: int):
+    """ Split iterable into lists of size items """
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_load(session: Session, model, rows, chunk_size: int = CHUNK_SIZE) -> int:
+    """ Multi-row insert of rows into the model table, chunk by chunk """
+
+    total = 0
+    statement = insert(model.__table__)
+
+    for chunk in chunked(rows, chunk_size):
+        session.execute(statement, chunk)
+        total += len(chunk)
+
+    return total
+
+
+def reset_sequence(session: Session, model):
+    """ Move the id sequence past the explicitly inserted ids """
+
+    if db.engine.dialect.name != "postgresql":
+        return
+
+    table = model.__tablename__
+    session.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+    ))
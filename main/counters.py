@@ -0,0 +1,75 @@
+"""
+    Main blueprint
+    per-user counters read model
+"""
+
+# global imports
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select, delete
+from sqlalchemy.orm import Session
+
+# local imports
+from main.models import db, User, Order, Offer, UserCounter
+from main.versions import bump_versions
+
+
+def shift_counters(session: Session, user_id: int, **deltas: int):
+    """ Add deltas to the user counters inside the current transaction
+
+    shift_counters(session, 1, orders_owner=1, offers_total=-1)
+    """
+
+    values = {
+        getattr(UserCounter, name): getattr(UserCounter, name) + delta
+        for name, delta in deltas.items() if delta
+    }
+
+    if not values or user_id is None:
+        return
+
+    session.query(UserCounter)\
+        .filter(UserCounter.user_id == user_id)\
+        .update(values, synchronize_session=False)
+
+
+def rebuild_counters(session: Session):
+    """ Create the counters table if it is missing and recalculate all user
+    counters from the orders and offers tables
+    """
+
+    UserCounter.__table__.create(session.connection(), checkfirst=True)
+
+    orders_owner = select(func.count(Order.id))\
+        .where(Order.customer_id == User.id)\
+        .scalar_subquery()
+
+    orders_executor = select(func.count(Order.id))\
+        .where(Order.executor_id == User.id)\
+        .scalar_subquery()
+
+    offers_total = select(func.count(Offer.id))\
+        .where(Offer.executor_id == User.id)\
+        .scalar_subquery()
+
+    session.execute(delete(UserCounter))
+    session.execute(
+        insert(UserCounter).from_select(
+            ["user_id", "orders_owner", "orders_executor", "offers_total"],
+            select(User.id, orders_owner, orders_executor, offers_total)
+        )
+    )
+
+
+@click.command("rebuild-counters")
+@with_appcontext
+def rebuild_counters_command():
+    """ Create or rebuild the users counters read model """
+
+    session: Session = db.session
+    with session():
+        rebuild_counters(session)
+        bump_versions(session, "users")
+        session.commit()
+
+    click.echo("Counters rebuilt.")
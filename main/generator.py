@@ -0,0 +1,217 @@
+"""
+    Main blueprint
+    synthetic users, orders and offers
+"""
+from __future__ import annotations
+
+# global imports
+import datetime
+import json
+import random
+from pathlib import Path
+
+# local imports
+from main.models_checkers import \
+    check_name, check_description, check_address, check_email
+
+
+data_path = Path(__file__).resolve().parent.parent / "data/json_source"
+
+
+class GeneratorConfig:
+    """ Sizes and distributions of a generated data set
+
+    Ranges are inclusive (low, high) pairs drawn uniformly. The same
+    config and seed always produce the same rows.
+    """
+
+    def __init__(
+            self,
+            users: int = 1000,
+            customer_share: float = 0.5,
+            orders_per_customer: tuple = (0, 6),
+            offers_per_order: tuple = (0, 4),
+            start_dates: tuple = (datetime.date(2020, 1, 1), datetime.date(2024, 12, 31)),
+            duration_days: tuple = (1, 365),
+            prices: tuple = (100, 10_000),
+            ages: tuple = (18, 65),
+            seed: int = 16
+    ):
+        if users < 2 or not 0 < customer_share < 1:
+            raise ValueError("Users need at least one customer and one executor")
+
+        self.users = users
+        self.customer_share = customer_share
+        self.orders_per_customer = orders_per_customer
+        self.offers_per_order = offers_per_order
+        self.start_dates = start_dates
+        self.duration_days = duration_days
+        self.prices = prices
+        self.ages = ages
+        self.seed = seed
+
+        self.customers = self.customers_up_to(users)
+        self.executors = users - self.customers
+
+        if not self.customers or not self.executors:
+            raise ValueError("Users need at least one customer and one executor")
+
+    # roles are spread evenly over the ids, so the k-th customer or
+    # executor id is computed instead of kept in a list
+
+    def customers_up_to(self, pk: int) -> int:
+        return int(pk * self.customer_share)
+
+    def role(self, pk: int) -> str:
+        return "customer" if self.customers_up_to(pk) > self.customers_up_to(pk - 1) else "executor"
+
+    def _nth(self, number: int, count_up_to) -> int:
+        """ Smallest id with count_up_to(id) == number """
+
+        low, high = 1, self.users
+        while low < high:
+            middle = (low + high) // 2
+            if count_up_to(middle) < number:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def customer_id(self, number: int) -> int:
+        return self._nth(number, self.customers_up_to)
+
+    def executor_id(self, number: int) -> int:
+        return self._nth(number, lambda pk: pk - self.customers_up_to(pk))
+
+
+def load_pools() -> dict:
+    """ Names, descriptions and addresses of the json sources that pass models_checkers """
+
+    users = json.loads((data_path / "users.json").read_text(encoding="utf-8"))
+    orders = json.loads((data_path / "orders.json").read_text(encoding="utf-8"))
+
+    return {
+        "first_names": sorted({user["first_name"] for user in users if check_name(user["first_name"]) is None}),
+        "last_names": sorted({user["last_name"] for user in users if check_name(user["last_name"]) is None}),
+        "descriptions": sorted({
+            order["description"] for order in orders if check_description(order["description"]) is None
+        }),
+        "addresses": sorted({order["address"] for order in orders if check_address(order["address"]) is None}),
+    }
+
+
+def generate_users(config: GeneratorConfig, pools: dict):
+    """ User rows with ids 1..config.users """
+
+    generator = random.Random(f"{config.seed}-users")
+
+    for pk in range(1, config.users + 1):
+        first_name = generator.choice(pools["first_names"])
+        last_name = generator.choice(pools["last_names"])
+        email = f"{first_name}.{last_name}{pk}@mymail.com".lower()
+
+        yield {
+            "id": pk,
+            "first_name": first_name,
+            "last_name": last_name,
+            "age": generator.randint(*config.ages),
+            "email": email if check_email(email) is None else f"user{pk}@mymail.com",
+            "role": config.role(pk),
+            "phone": str(7_000_000_000 + pk),
+        }
+
+
+def generate_orders(config: GeneratorConfig, pools: dict):
+    """ Order rows with ids from 1, customer by customer """
+
+    generator = random.Random(f"{config.seed}-orders")
+
+    first_day = config.start_dates[0].toordinal()
+    last_day = config.start_dates[1].toordinal()
+
+    pk = 0
+
+    for customer in range(1, config.customers + 1):
+        customer_id = config.customer_id(customer)
+
+        for _ in range(generator.randint(*config.orders_per_customer)):
+            pk += 1
+            description = generator.choice(pools["descriptions"])
+            start_date = datetime.date.fromordinal(generator.randint(first_day, last_day))
+
+            yield {
+                "id": pk,
+                "name": " ".join(description.strip().split()[:4]),
+                "description": description,
+                "start_date": start_date,
+                "end_date": start_date + datetime.timedelta(days=generator.randint(*config.duration_days)),
+                "address": generator.choice(pools["addresses"]),
+                "price": generator.randint(*config.prices),
+                "customer_id": customer_id,
+                "executor_id": config.executor_id(generator.randint(1, config.executors)),
+            }
+
+
+def generate_offers(config: GeneratorConfig, pools: dict):
+    """ Offer rows with ids from 1, order by order
+
+    Orders are generated again from the same seed rather than kept.
+    """
+
+    generator = random.Random(f"{config.seed}-offers")
+
+    pk = 0
+
+    for order in generate_orders(config, pools):
+        for _ in range(generator.randint(*config.offers_per_order)):
+            pk += 1
+
+            yield {
+                "id": pk,
+                "order_id": order["id"],
+                "executor_id": config.executor_id(generator.randint(1, config.executors)),
+            }
+
+
+# app_install reads 0-based order and offer ids and references to them,
+# with dates as mm/dd/YYYY
+
+def to_json_user(user: dict) -> dict:
+    return user
+
+
+def to_json_order(order: dict) -> dict:
+    return {
+        **order,
+        "id": order["id"] - 1,
+        "start_date": order["start_date"].strftime("%m/%d/%Y"),
+        "end_date": order["end_date"].strftime("%m/%d/%Y"),
+        "customer_id": order["customer_id"] - 1,
+        "executor_id": order["executor_id"] - 1,
+    }
+
+
+def to_json_offer(offer: dict) -> dict:
+    return {
+        "id": offer["id"] - 1,
+        "order_id": offer["order_id"] - 1,
+        "executor_id": offer["executor_id"] - 1,
+    }
+
+
+def write_json_array(path: Path, items) -> int:
+    """ Stream items to path as a JSON array, one item per line """
+
+    total = 0
+
+    with path.open("wt", encoding="utf-8") as fout:
+        fout.write("[")
+
+        for item in items:
+            fout.write(",\n" if total else "\n")
+            fout.write(json.dumps(item, ensure_ascii=False))
+            total += 1
+
+        fout.write("\n]\n")
+
+    return total
@@ -0,0 +1,45 @@
+"""
+    internal blueprint
+    views
+"""
+
+
+# global imports
+from flask import Blueprint, jsonify, current_app
+
+# local imports
+from grm import response_cache, metrics, replica, InstrumentedQueuePool
+from main.models import db
+
+
+bp_internal = Blueprint("bp_internal", __name__)
+bp_metrics = Blueprint("bp_metrics", __name__)
+
+
+@bp_internal.route("/cache", methods=["GET"])
+def index_cache_stats():
+
+    return jsonify(response_cache.stats()), 200
+
+
+@bp_internal.route("/pool", methods=["GET"])
+def index_pool_stats():
+
+    pool = db.engine.pool
+
+    if isinstance(pool, InstrumentedQueuePool):
+        return jsonify(pool.stats()), 200
+
+    return jsonify({"pool": type(pool).__name__, "status": pool.status()}), 200
+
+
+@bp_internal.route("/replica", methods=["GET"])
+def index_replica_stats():
+
+    return jsonify(replica.stats()), 200
+
+
+@bp_metrics.route("/_metrics", methods=["GET"])
+def index_metrics():
+
+    return current_app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4"), 200
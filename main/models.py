@@ -5,31 +5,94 @@
 
 # global imports
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 # local imports
 from flask import current_app
+from grm.replica import RoutingSQLAlchemy
 
 
-db: SQLAlchemy = SQLAlchemy()
+# queries of read-only adapters go to the replica bind, see grm.replica
+db: SQLAlchemy = RoutingSQLAlchemy()
+
+# bigserial on Postgres, SQLite only autoincrements an INTEGER PRIMARY KEY
+BigId = db.BigInteger().with_variant(db.Integer(), "sqlite")
+
+
+@event.listens_for(Engine, "connect")
+def add_sqlite_functions(dbapi_connection, connection_record):
+    """ Postgres functions the adapters use that SQLite stand-ins lack """
+
+    # only SQLite connections, sync or aiosqlite, can define functions
+    if not hasattr(dbapi_connection, "create_function"):
+        return
+
+    dbapi_connection.create_function(
+        "concat", -1,
+        lambda *values: "".join("" if value is None else str(value) for value in values)
+    )
+
+
+def full_name(first_name: str, last_name: str) -> str:
+    """ Display name and sort key of a user """
+
+    return f"{first_name} {last_name}"
+
+
+def default_full_name(context) -> str:
+    """ full_name of inserts that leave it out, bulk loads included """
+
+    parameters = context.get_current_parameters()
+    return full_name(parameters["first_name"], parameters["last_name"])
 
 
 class User(db.Model):
     __tablename__ = "users"
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigId, primary_key=True)
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer, db.CheckConstraint("age >= 18"))
     email = db.Column(db.String(100), nullable=False, unique=False)
     role = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(30), nullable=False, unique=True)
+    # full_name(first_name, last_name), maintained by the users adapters
+    full_name = db.Column(db.String(201), nullable=False, default=default_full_name)
 
     orders_owner = db.relationship("Order", foreign_keys="Order.customer_id")
     orders_executor = db.relationship("Order", foreign_keys="Order.executor_id")
     offers = db.relationship("Offer", foreign_keys="Offer.executor_id")
 
+    counters = db.relationship("UserCounter", uselist=False, cascade="all, delete-orphan", back_populates="user")
+
+    __table_args__ = (
+        db.Index("ix_users_first_name_last_name", "first_name", "last_name", "id"),
+        db.Index("ix_users_age", "age", "id"),
+        db.Index("ix_users_full_name", "full_name", "id"),
+        db.Index("ix_users_role_first_name_last_name", "role", "first_name", "last_name", "id"),
+        db.Index("ix_users_role_age", "role", "age", "id"),
+    )
+
+
+class UserCounter(db.Model):
+    """ Per-user counters read model, maintained by the write adapters """
+    __tablename__ = "users_counters"
+    user_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), primary_key=True)
+    orders_owner = db.Column(db.Integer, nullable=False, default=0)
+    orders_executor = db.Column(db.Integer, nullable=False, default=0)
+    offers_total = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship("User", back_populates="counters")
+
+    __table_args__ = (
+        db.Index("ix_users_counters_orders_owner", "orders_owner", "user_id"),
+        db.Index("ix_users_counters_orders_executor", "orders_executor", "user_id"),
+        db.Index("ix_users_counters_offers_total", "offers_total", "user_id"),
+    )
+
 
 class Order(db.Model):
     __tablename__ = "orders"
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigId, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     start_date = db.Column(db.Date, nullable=False)
@@ -38,16 +101,49 @@ class Order(db.Model):
     price = db.Column(db.Integer, nullable=False)
     customer_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), nullable=False)
     executor_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), nullable=False)
+    # users.full_name of the customer and the executor, maintained by main.order_names
+    customer_name = db.Column(db.String(201))
+    executor_name = db.Column(db.String(201))
 
     customer = db.relationship("User", foreign_keys="Order.customer_id", back_populates="orders_owner")
     executor = db.relationship("User", foreign_keys="Order.executor_id", back_populates="orders_executor")
 
+    __table_args__ = (
+        db.Index("ix_orders_start_date", "start_date", "id"),
+        db.Index("ix_orders_end_date", "end_date", "id"),
+        db.Index("ix_orders_price", "price", "id"),
+        db.Index("ix_orders_customer_id_start_date", "customer_id", "start_date", "id"),
+        db.Index("ix_orders_customer_id_end_date", "customer_id", "end_date", "id"),
+        db.Index("ix_orders_customer_id_price", "customer_id", "price", "id"),
+        db.Index("ix_orders_executor_id_start_date", "executor_id", "start_date", "id"),
+        db.Index("ix_orders_executor_id_end_date", "executor_id", "end_date", "id"),
+        db.Index("ix_orders_executor_id_price", "executor_id", "price", "id"),
+    )
+
 
 class Offer(db.Model):
     __tablename__ = "offers"
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigId, primary_key=True)
     order_id = db.Column(db.BigInteger, db.ForeignKey("orders.id"), nullable=False)
     executor_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), nullable=False)
+    # executor_id == order.executor_id, maintained by main.approvals
+    is_approved = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     order = db.relationship("Order")
     executor = db.relationship("User", back_populates="offers")
+
+    __table_args__ = (
+        db.Index("ix_offers_order_id", "order_id", "id"),
+        db.Index("ix_offers_executor_id", "executor_id", "id"),
+        db.Index("ix_offers_is_approved", "is_approved", "id"),
+        db.Index("ix_offers_executor_id_order_id", "executor_id", "order_id", "id"),
+        db.Index("ix_offers_executor_id_is_approved", "executor_id", "is_approved", "id"),
+        db.Index("ix_offers_executor_id_is_approved_order_id", "executor_id", "is_approved", "order_id", "id"),
+    )
+
+
+class TableVersion(db.Model):
+    """ Change version of a table, bumped by every write to it """
+    __tablename__ = "tables_versions"
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
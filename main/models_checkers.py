@@ -4,20 +4,97 @@
 """
 from __future__ import annotations
 
-import operator
 import re
 from datetime import datetime
-from functools import reduce
 
 
 low_vowels = "aeiouyаеёиоуыэюя"
+vowels = frozenset(low_vowels)
 email_regex = re.compile(r"([-!#-'*+/-9=?A-Z^-~]+(\.[-!#-'*+/-9=?A-Z^-~]+)*|\"([]!#-[^-~ \t]|(\\[\t -~]))+\")@([-!#-'*+/-9=?A-Z^-~]+(\.[-!#-'*+/-9=?A-Z^-~]+)*|\[[\t -Z^-~]*])")
-phone_regex = re.compile(r"^\+?\d{1,4}?[-.\s]?\(?\d{1,3}?\)?[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}$")
+
+# input length caps, the lengths of the users.email and users.phone columns
+EMAIL_MAX_LENGTH = 100
+PHONE_MAX_LENGTH = 30
+
+# the groups add up to 31 characters, the lookahead caps it at the column length
+phone_regex = re.compile(
+    r"^(?![\s\S]{%d})\+?\d{1,4}?[-.\s]?\(?\d{1,3}?\)?[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}$" % (PHONE_MAX_LENGTH + 1)
+)
+
+
+def _characters(*ranges: str) -> frozenset:
+    """ Set of characters from "az"-like ranges and single characters """
+    return frozenset(
+        chr(code)
+        for item in ranges
+        for code in range(ord(item[0]), ord(item[-1]) + 1)
+    )
+
+
+# character classes of email_regex
+email_atext = _characters("-", "!", "#'", "*", "+", "/9", "=", "?", "AZ", "^~")
+email_qtext = _characters("]", "!", "#[", "^~", " ", "\t")
+email_quoted_pair = _characters("\t", " ~")
+email_dtext = _characters("\t", " Z", "^~")
+
+
+def _is_dot_atom(text: str) -> bool:
+    """ Non-empty atoms of atext separated by single dots """
+
+    return all(atom and email_atext.issuperset(atom) for atom in text.split("."))
+
+
+def _quoted_string_end(text: str) -> int:
+    """ End of the non-empty quoted string text starts with, -1 if there is none """
+
+    length = len(text)
+    index = 1
+
+    while index < length:
+        character = text[index]
+
+        if character == "\"":
+            return index + 1 if index > 1 else -1
+
+        if character == "\\":
+            if index + 1 < length and text[index + 1] in email_quoted_pair:
+                index += 2
+                continue
+            return -1
+
+        if character not in email_qtext:
+            return -1
+
+        index += 1
+
+    return -1
+
+
+def is_email(text: str) -> bool:
+    """ Same language as email_regex, in linear time without backtracking """
+
+    if text.startswith("\""):
+        at = _quoted_string_end(text)
+        if at < 0 or not text.startswith("@", at):
+            return False
+    else:
+        at = text.find("@")
+        if at < 0 or not _is_dot_atom(text[:at]):
+            return False
+
+    domain = text[at + 1:]
+
+    if domain.startswith("["):
+        return len(domain) > 1 and domain.endswith("]") and email_dtext.issuperset(domain[1:-1])
+
+    return _is_dot_atom(domain)
 
 
 def check_name(name: str) -> str | None:
-    """ Check human name 
-    :rtype: object
+    """ Check human name
+
+    One pass over the lowered name. Errors keep their priority: wrong
+    symbols (spaces included), ru and en mix, vowels run, consonants run.
     """
 
     # 0. Is name None or not str?
@@ -25,62 +102,45 @@ def check_name(name: str) -> str | None:
     if not name or not isinstance(name, str):
         return "No name or wrong type"
 
-    name = name.lower()
-
-    # 1. Are there wrong symbols inside?
+    has_en = has_ru = False
+    vowels_run = consonants_run = 0
+    max_vowels_run = max_consonants_run = 0
 
-    result = reduce(
-        operator.add,
-        [not (
-                ("a" <= character <= "z") or
-                ("а" <= character <= "я") or
-                character in "'"
-        ) for character in name]
-    )
+    for character in name.lower():
 
-    if result > 0:
-        return "There are wrong symbols inside"
+        # 1. Are there wrong symbols inside?
 
-    # 2. Are there more than one space
+        if "a" <= character <= "z":
+            has_en = True
+        elif "а" <= character <= "я":
+            has_ru = True
+        elif character != "'":
+            return "There are wrong symbols inside"
 
-    result = name.count(" ")
+        # 4, 5. Vowels and consonants in a row, an apostrophe breaks both
 
-    if result > 0:
-        return "There are more than zero spaces"
+        if character in vowels:
+            vowels_run += 1
+            consonants_run = 0
+            if vowels_run > max_vowels_run:
+                max_vowels_run = vowels_run
+        elif character == "'":
+            vowels_run = consonants_run = 0
+        else:
+            consonants_run += 1
+            vowels_run = 0
+            if consonants_run > max_consonants_run:
+                max_consonants_run = consonants_run
 
     # 3. Are there ru and en characters inside?
 
-    result = reduce(
-        lambda acc, item: (acc[0] + item[0], acc[1] + item[1]),
-        [(
-            ("a" <= character <= "z"),
-            ("а" <= character <= "я")
-        ) for character in name]
-    )
-
-    if result[0] and result[1]:
+    if has_en and has_ru:
         return "There are ru and en characters inside"
 
-    # 4. Are there more than 2 vowels in a row?
-
-    result = max(reduce(
-        lambda acc, item: (acc[0] + 1, *acc[1:], ) if item in "aeiouyаеёиоуыэюя" else (0, *acc),
-        [character for character in name],
-        (0,)
-    ))
-
-    if result > 2:
+    if max_vowels_run > 2:
         return "There are more than 2 vowels in a row"
 
-    # 5. Are there more than 2 consonants in a row?
-
-    result = max(reduce(
-        lambda acc, item: (acc[0] + 1, *acc[1:],) if item not in "aeiouyаеёиоуыэюя'" else (0, *acc),
-        [character for character in name],
-        (0,)
-    ))
-
-    if result > 2:
+    if max_consonants_run > 2:
         return "There are more than 2 consonants in a row"
 
 
@@ -108,7 +168,7 @@ def check_email(email: str) -> str | None:
     if not email or not isinstance(email, str):
         return "No E-Mail or wrong type"
 
-    if not re.fullmatch(email_regex, email):
+    if len(email) > EMAIL_MAX_LENGTH or not is_email(email):
         return "Wrong E-Mail."
 
 
@@ -128,7 +188,8 @@ def check_phone(phone: str) -> str | None:
     if not phone or not isinstance(phone, str):
         return "No phone or wrong type"
 
-    if not re.fullmatch(phone_regex, phone):
+    # phone_regex is never run past the cap, so its backtracking stays bounded
+    if len(phone) > PHONE_MAX_LENGTH or not re.fullmatch(phone_regex, phone):
         return "Wrong phone."
 
 
@@ -183,3 +244,50 @@ def check_price(price: int) -> str | None:
     if price < 100:
         return "Do it yourself for that kind of money"
 
+
+def check_batch(items: list, limit: int) -> str | None:
+    """ Check batch of json objects """
+
+    if items is None or not isinstance(items, list):
+        return "There isn't list of items or wrong type"
+
+    if len(items) == 0:
+        return "The list of items is empty"
+
+    if len(items) > limit:
+        return f"Too many items, send no more than {limit}"
+
+
+def validate_users(batch: list) -> list[list[str]]:
+    """ All error messages of every user in the batch, [] for a valid user
+
+    Names repeat a lot in imports, each distinct name is checked once.
+    """
+
+    names = {}
+
+    def check_name_once(name):
+        if not isinstance(name, str):
+            return check_name(name)
+        if name not in names:
+            names[name] = check_name(name)
+        return names[name]
+
+    result = []
+
+    for user in batch:
+
+        if not isinstance(user, dict):
+            result.append(["Wrong user type"])
+            continue
+
+        result.append([message for message in [
+            check_name_once(user.get("first_name", None)),
+            check_name_once(user.get("last_name", None)),
+            check_age(user.get("age", None)),
+            check_email(user.get("email", None)),
+            check_role(user.get("role", None)),
+            check_phone(user.get("phone", None))
+        ] if message is not None])
+
+    return result
@@ -2,27 +2,74 @@
     offers blueprint
     adapter
 """
+from __future__ import annotations
 
 
 # global imports
-from sqlalchemy import func, or_, and_, desc, text
+from collections import Counter
+
+from sqlalchemy import func, or_, and_, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Query, aliased, load_only, Session
 
 # local imports
 from sqlalchemy.sql import label
 
-from grm import BaseAdapter, to_dict_from_alchemy_model as to_dict
+from grm import \
+    BaseAdapter, BaseExportAdapter, get_serializer, \
+    order_by_keys, seek, next_cursor, batch_failed, flush_each, response_cache, loader
+from main.approvals import is_approved
+from main.counters import shift_counters
+from main.versions import bump_versions
 from main.models import db, User, Order, Offer
-from main.models_checkers import check_pk
+from main.models_checkers import check_pk, check_batch
+
+
+# cached responses that show data written by this module
+cache_namespaces = ("users", "offers")
+
+# sort key and display name of the offer executor
+user_full_name = User.full_name
+
+# is_approved is returned next to the order fields in lists only
+offer_fields = get_serializer(Offer, ["id", "order_id", "executor_id"])
+
+
+def offers_query() -> Query:
+    """ Offers with the executor name, approval state and order start date
+
+    The executor join is an inner join, the default sort walks the users
+    index; PKOfferListAdapter counts through the same join.
+    """
+
+    return Offer.query.with_entities(
+        Offer,
+        user_full_name.label('user_full_name'),
+        Offer.is_approved,
+        Order.start_date
+    )\
+        .join(User, User.id == Offer.executor_id)\
+        .join(Order, Order.id == Offer.order_id, isouter=True)
+
+
+def offer_row(row) -> dict:
+    """ Row of offers_query() as a dict """
+
+    return {
+        **offer_fields(row[0]),
+        "executor": row[1],
+        "is_approved": row[2],
+        "start": row[3],
+    }
 
 
 class AllOffersAdapter(BaseAdapter):
 
+    read_only = True
     filter_by_list = ["default", "user", "order", "rejected", "approved", "user_rejected", "user_approved"]
     order_by_list = ["default", "user", "order", "order_date", "order_date_asc"]
 
-    def __init__(self, limit=10, offset=0, filter_by="default", order_by="default", user_pk=None, order_pk=None):
+    def __init__(self, limit=10, offset=0, filter_by="default", order_by="default", user_pk=None, order_pk=None, cursor=None):
 
         if limit < 1:
             limit = 10
@@ -36,15 +83,10 @@ class AllOffersAdapter(BaseAdapter):
         if order_by not in self.order_by_list:
             order_by = self.order_by_list[0]
 
-        query: Query = Offer.query
-        query = query.with_entities(
-            Offer,
-            func.concat(User.first_name, " ", User.last_name).label('user_full_name'),
-            (Order.executor_id == Offer.executor_id).label("is_approved"),
-            Order.start_date
-        )\
-            .join(User, User.id == Offer.executor_id, isouter=True)\
-            .join(Order, Order.id == Offer.order_id, isouter=True)
+        if self._from_cache("offers", limit, offset, filter_by, order_by, user_pk, order_pk, cursor):
+            return
+
+        query: Query = offers_query()
 
         if filter_by == "default":
             pass
@@ -53,59 +95,89 @@ class AllOffersAdapter(BaseAdapter):
         elif filter_by == "order" and type(order_pk) is int:
             query: Query = query.filter(Offer.order_id == order_pk)
         elif filter_by == "rejected":
-            query: Query = query.filter((Order.executor_id == Offer.executor_id) == False)
+            query: Query = query.filter(Offer.is_approved == False)
         elif filter_by == "approved":
-            query: Query = query.filter((Order.executor_id == Offer.executor_id) == True)
+            query: Query = query.filter(Offer.is_approved == True)
         elif filter_by == "user_rejected" and type(user_pk) is int:
             query: Query = query.filter(
-                (Order.executor_id == Offer.executor_id) == False,
-                Offer.executor_id == user_pk
+                Offer.executor_id == user_pk,
+                Offer.is_approved == False
             )
         elif filter_by == "user_approved":
             query: Query = query.filter(
-                (Order.executor_id == Offer.executor_id) == True,
-                Offer.executor_id == user_pk
+                Offer.executor_id == user_pk,
+                Offer.is_approved == True
             )
 
+        descending = False
+
         if order_by == "default" or order_by == "user":
-            query: Query = query.order_by('user_full_name')
+            # users by (full_name, id), then each user's offers by id:
+            # the order of the two indexes, read until the limit
+            sort_keys = [user_full_name, User.id]
         elif order_by == "order":
-            query: Query = query.order_by(Offer.order_id)
+            sort_keys = [Offer.order_id]
         elif order_by == "order_date":
-            query: Query = query.order_by(desc(Order.start_date))
+            sort_keys, descending = [Order.start_date], True
         elif order_by == "order_date_asc":
-            query: Query = query.order_by(Order.start_date)
+            sort_keys = [Order.start_date]
+
+        # the offers of one order share its start date, the order_id index sorts them
+        if filter_by == "order" and order_by in ("order_date", "order_date_asc"):
+            sort_keys = []
+
+        sort_keys.append(Offer.id)
+
+        if cursor is None:
+            query: Query = order_by_keys(query, sort_keys, descending).limit(limit).offset(offset)
+        else:
+            query: Query = seek(query, sort_keys, descending, cursor).limit(limit)
+
+        rows = query.all()
 
-        query: Query = query.limit(limit).offset(offset)
+        self._data = [offer_row(row) for row in rows]
 
-        self._data = [{
-            **to_dict(row[0]),
-            "executor": row[1],
-            "is_approved": row[2],
-            "start": row[3],
-        } for row in query.all()]
+        if cursor is not None:
+            self._data = {"items": self._data, "next_cursor": next_cursor(rows, sort_keys, limit)}
+
+
+class ExportOffersAdapter(BaseExportAdapter):
+
+    def __init__(self, export_format="ndjson"):
+        super().__init__(offers_query().order_by(Offer.id), offer_row, export_format)
 
 
 class OfferByPKAdapter(BaseAdapter):
 
+    read_only = True
+
     def __init__(self, pk):
 
         if pk < 1:
             self._data = None
             return
 
-        self._data = to_dict(Offer.query.get(pk))
+        if self._from_cache("offers", pk):
+            return
+
+        self._data = offer_fields(Offer.query.get(pk))
 
 
 class PKOfferListAdapter(BaseAdapter):
 
+    read_only = True
+
     def __init__(self, filter_by, user_pk, order_pk):
 
         if filter_by not in AllOffersAdapter.filter_by_list:
             filter_by = AllOffersAdapter.filter_by_list[0]
 
+        if self._from_cache("offers", filter_by, user_pk, order_pk):
+            return
+
+        # the same executor join as offers_query(), so the count matches the list
         query: Query = Offer.query.with_entities(func.count(Offer.id))\
-            .join(Order, Order.id == Offer.order_id, isouter=True)
+            .join(User, User.id == Offer.executor_id)
 
         if filter_by == "default":
             pass
@@ -114,18 +186,18 @@ class PKOfferListAdapter(BaseAdapter):
         elif filter_by == "order" and type(order_pk) is int:
             query: Query = query.filter(Offer.order_id == order_pk)
         elif filter_by == "rejected":
-            query: Query = query.filter((Order.executor_id == Offer.executor_id) == False)
+            query: Query = query.filter(Offer.is_approved == False)
         elif filter_by == "approved":
-            query: Query = query.filter((Order.executor_id == Offer.executor_id) == True)
+            query: Query = query.filter(Offer.is_approved == True)
         elif filter_by == "user_rejected" and type(user_pk) is int:
             query: Query = query.filter(
-                (Order.executor_id == Offer.executor_id) == False,
-                Offer.executor_id == user_pk
+                Offer.executor_id == user_pk,
+                Offer.is_approved == False
             )
         elif filter_by == "user_approved":
             query: Query = query.filter(
-                (Order.executor_id == Offer.executor_id) == True,
-                Offer.executor_id == user_pk
+                Offer.executor_id == user_pk,
+                Offer.is_approved == True
             )
 
         self._data = {
@@ -136,30 +208,56 @@ class PKOfferListAdapter(BaseAdapter):
         }
 
 
+def check_new_offer(json_object) -> str | None:
+    """ Error message for the fields of a new offer """
+
+    if not isinstance(json_object, dict):
+        return "Wrong offer type"
+
+    check_result = [result for result in [
+        check_pk(json_object.get("order_id", None)),
+        check_pk(json_object.get("executor_id", None))
+    ] if result is not None]
+
+    if len(check_result) != 0:
+        return "\n".join(check_result)
+
+
+def check_offer_refs(order: Order | None, executor: User | None) -> str | None:
+    """ Error message for the order and the executor of an offer """
+
+    if order is None:
+        return "Order not found"
+
+    if executor is None:
+        return "Executor not found"
+
+    if order.executor_id == executor.id:
+        return "Executor already in the order"
+
+    if executor.role != "executor":
+        return "You have chosen not the executor"
+
+
 class AddOfferAdapter(BaseAdapter):
 
     def __init__(self, json_object):
 
-        order_id = json_object.get("order_id", None)
-        executor_id = json_object.get("executor_id", None)
-
-        check_result = [result for result in [
-            check_pk(order_id),
-            check_pk(executor_id)
-        ] if result is not None]
+        check_result = check_new_offer(json_object)
 
-        if len(check_result) != 0:
+        if check_result is not None:
             self._data = {
                 "status": "error",
-                "message": "\n".join(check_result)
+                "message": check_result
             }
             return
 
+        order_id = json_object["order_id"]
+        executor_id = json_object["executor_id"]
+
         try:
-            order: Order = Order.query.get(order_id)
-            if order is None:
-                raise SQLAlchemyError()
-        except SQLAlchemyError as exception:
+            order: Order = loader(Order).get(order_id)
+        except SQLAlchemyError:
             self._data = {
                 "status": "error",
                 "message": "Order not found"
@@ -167,27 +265,20 @@ class AddOfferAdapter(BaseAdapter):
             return
 
         try:
-            executor: User = User.query.get(executor_id)
-            if executor is None:
-                raise SQLAlchemyError()
-        except SQLAlchemyError as exception:
+            executor: User = loader(User).get(executor_id)
+        except SQLAlchemyError:
             self._data = {
                 "status": "error",
                 "message": "Executor not found"
             }
             return
 
-        if order.executor_id == executor.id:
-            self._data = {
-                "status": "error",
-                "message": "Executor already in the order"
-            }
-            return
+        check_result = check_offer_refs(order, executor)
 
-        if executor.role != "executor":
+        if check_result is not None:
             self._data = {
                 "status": "error",
-                "message": "You have chosen not the executor"
+                "message": check_result
             }
             return
 
@@ -198,10 +289,14 @@ class AddOfferAdapter(BaseAdapter):
                 session.add(
                     Offer(
                         order_id=order_id,
-                        executor_id=executor_id
+                        executor_id=executor_id,
+                        is_approved=is_approved(order, executor_id)
                     )
                 )
 
+                shift_counters(session, executor_id, offers_total=1)
+
+                bump_versions(session, "offers")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -212,9 +307,100 @@ class AddOfferAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
 
 
+class AddOffersBatchAdapter(BaseAdapter):
+
+    batch_limit = 1000
+
+    def __init__(self, json_list):
+
+        check_result = check_batch(json_list, self.batch_limit)
+
+        if isinstance(check_result, str):
+            self._data = {
+                "status": "error",
+                "message": check_result
+            }
+            return
+
+        items = []
+        checked = []
+
+        for index, json_object in enumerate(json_list):
+            check_result = check_new_offer(json_object)
+
+            if check_result is not None:
+                items.append({"status": "error", "message": check_result, "id": None})
+                continue
+
+            checked.append(index)
+            items.append({"status": "ok", "message": None, "id": None})
+
+        order_ids = {json_list[index]["order_id"] for index in checked}
+        executor_ids = {json_list[index]["executor_id"] for index in checked}
+
+        try:
+            orders = loader(Order).load(*order_ids)
+            executors = loader(User).load(*executor_ids)
+        except SQLAlchemyError as exception:
+            self._data = {
+                "status": "error",
+                "message": str(exception)
+            }
+            return
+
+        offers = {}
+
+        for index in checked:
+            json_object = json_list[index]
+
+            check_result = check_offer_refs(
+                orders.get(json_object["order_id"]),
+                executors.get(json_object["executor_id"])
+            )
+
+            if check_result is not None:
+                items[index] = {"status": "error", "message": check_result, "id": None}
+                continue
+
+            offers[index] = Offer(
+                order_id=json_object["order_id"],
+                executor_id=json_object["executor_id"],
+                is_approved=is_approved(orders.get(json_object["order_id"]), json_object["executor_id"])
+            )
+
+        session: Session = db.session
+        with session():
+
+            try:
+                # the version bump is the first write, so on SQLite as well the
+                # savepoints of the items nest in the batch transaction
+                bump_versions(session, "offers")
+                saved = flush_each(session, offers, items).values()
+
+                offers_total = Counter(offer.executor_id for offer in saved)
+
+                for user_id, total in offers_total.items():
+                    shift_counters(session, user_id, offers_total=total)
+
+                session.commit()
+
+            except SQLAlchemyError as exception:
+                session.rollback()
+                self._data = {
+                    "status": "error",
+                    "message": str(exception),
+                    "items": batch_failed(items)
+                }
+                return
+
+        response_cache.invalidate(*cache_namespaces)
+        self._data = {"status": "ok", "message": None, "items": items}
+
+
 class UpdateOfferAdapter(BaseAdapter):
 
     def __init__(self, json_object, pk):
@@ -228,7 +414,7 @@ class UpdateOfferAdapter(BaseAdapter):
             return
 
         try:
-            offer: Offer = Offer.query.get(pk)
+            offer: Offer = loader(Offer).get(pk)
             if offer is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -260,33 +446,37 @@ class UpdateOfferAdapter(BaseAdapter):
             }
             return
 
-        if order_id:
-            try:
-                order: Order = Order.query.get(order_id)
-                if order is None:
-                    raise SQLAlchemyError()
-            except SQLAlchemyError as exception:
-                self._data = {
-                    "status": "error",
-                    "message": "Order not found"
-                }
-                return
-        else:
-            order = Order.query.get(offer.order_id)
+        try:
+            order: Order = loader(Order).get(order_id or offer.order_id)
+        except SQLAlchemyError:
+            self._data = {
+                "status": "error",
+                "message": "Order not found"
+            }
+            return
 
-        if executor_id:
-            try:
-                executor: User = User.query.get(executor_id)
-                if executor is None:
-                    raise SQLAlchemyError()
-            except SQLAlchemyError as exception:
-                self._data = {
-                    "status": "error",
-                    "message": "Executor not found"
-                }
-                return
-        else:
-            executor: User = User.query.get(offer.executor_id)
+        try:
+            executor: User = loader(User).get(executor_id or offer.executor_id)
+        except SQLAlchemyError:
+            self._data = {
+                "status": "error",
+                "message": "Executor not found"
+            }
+            return
+
+        if order_id and order is None:
+            self._data = {
+                "status": "error",
+                "message": "Order not found"
+            }
+            return
+
+        if executor_id and executor is None:
+            self._data = {
+                "status": "error",
+                "message": "Executor not found"
+            }
+            return
 
         if order_id or executor_id:
             if order.executor_id == executor.id:
@@ -296,6 +486,8 @@ class UpdateOfferAdapter(BaseAdapter):
                 }
                 return
 
+        old_executor_id = offer.executor_id
+
         if order_id:
             offer.order_id = order_id
 
@@ -308,13 +500,19 @@ class UpdateOfferAdapter(BaseAdapter):
                 return
             offer.executor_id = executor_id
 
+        offer.is_approved = is_approved(order, offer.executor_id)
+
         session: Session = db.session
         with session():
 
             try:
-                session.add(
-                    Offer(offer)
-                )
+                session.add(offer)
+
+                if offer.executor_id != old_executor_id:
+                    shift_counters(session, old_executor_id, offers_total=-1)
+                    shift_counters(session, offer.executor_id, offers_total=1)
+
+                bump_versions(session, "offers")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -325,6 +523,7 @@ class UpdateOfferAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
 
 
@@ -342,7 +541,7 @@ class DeleteOfferAdapter(BaseAdapter):
             return
 
         try:
-            offer: Offer = Offer.query.get(pk)
+            offer: Offer = loader(Offer).get(pk)
             if offer is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -356,6 +555,8 @@ class DeleteOfferAdapter(BaseAdapter):
         with session():
             try:
                 session.delete(offer)
+                shift_counters(session, offer.executor_id, offers_total=-1)
+                bump_versions(session, "offers")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -366,4 +567,5 @@ class DeleteOfferAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
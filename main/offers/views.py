@@ -9,11 +9,14 @@ from flask import Blueprint, request, current_app
 
 
 # local imports
+from main.versions import conditional
 from .adapter import \
     AllOffersAdapter, \
+    ExportOffersAdapter, \
     OfferByPKAdapter, \
     PKOfferListAdapter, \
     AddOfferAdapter, \
+    AddOffersBatchAdapter, \
     UpdateOfferAdapter, \
     DeleteOfferAdapter
 
@@ -21,6 +24,7 @@ bp_offers = Blueprint("bp_offers", __name__)
 
 
 @bp_offers.route("/", methods=["GET"])
+@conditional("offers", "users", "orders")
 def index_all_offers():
 
     limit = request.args.get("limit", 5, type=int)
@@ -29,14 +33,27 @@ def index_all_offers():
     order_by = request.args.get("order_by", "default", type=str)
     user_pk = request.args.get("user_pk", None, type=int)
     order_pk = request.args.get("order_pk", None, type=int)
+    cursor = request.args.get("cursor", None, type=str)
 
     with current_app.app_context():
-        json_object = AllOffersAdapter(limit, offset, filter_by, order_by, user_pk, order_pk).jsonify()
+        json_object = AllOffersAdapter(limit, offset, filter_by, order_by, user_pk, order_pk, cursor).jsonify()
 
     return json_object, 200
 
 
+@bp_offers.route("/export", methods=["GET"])
+def index_export_offers():
+
+    export_format = request.args.get("format", "ndjson", type=str)
+
+    with current_app.app_context():
+        response = ExportOffersAdapter(export_format).stream()
+
+    return response, 200
+
+
 @bp_offers.route("/<int:pk>", methods=["GET"])
+@conditional("offers")
 def index_offer_by_pk(pk):
 
     with current_app.app_context():
@@ -46,6 +63,7 @@ def index_offer_by_pk(pk):
 
 
 @bp_offers.route("/count", methods=["GET"])
+@conditional("offers", "orders")
 def index_get_offers_count():
 
     filter_by = request.args.get("filter_by", "default", type=str)
@@ -67,6 +85,15 @@ def index_add_new_odder():
     return json_object, 200
 
 
+@bp_offers.route("/batch", methods=["POST"])
+def index_add_offers_batch():
+
+    with current_app.app_context():
+        json_object = AddOffersBatchAdapter(request.json).jsonify()
+
+    return json_object, 200
+
+
 @bp_offers.route("/<int:pk>", methods=["PUT"])
 def index_update_odder_by_pk(pk):
 
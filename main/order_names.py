@@ -0,0 +1,90 @@
+"""
+    Main blueprint
+    customer and executor names stored on orders
+"""
+
+# global imports
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import Session, aliased
+
+# local imports
+from main.models import db, User, Order
+from main.versions import bump_versions
+
+
+def rename_user(session: Session, user_id: int, name: str):
+    """ Copy a new user name to the user's orders, inside the current transaction """
+
+    for column, name_column in [
+        (Order.customer_id, "customer_name"),
+        (Order.executor_id, "executor_name"),
+    ]:
+        session.execute(
+            update(Order)
+            .where(column == user_id)
+            .values({name_column: name})
+            .execution_options(synchronize_session=False)
+        )
+
+
+def rebuild_order_names(session: Session):
+    """ Copy the customer and executor names of all orders from the users table """
+
+    session.execute(
+        update(Order)
+        .values(
+            customer_name=select(User.full_name).where(User.id == Order.customer_id).scalar_subquery(),
+            executor_name=select(User.full_name).where(User.id == Order.executor_id).scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def check_order_names(session: Session) -> list[int]:
+    """ Ids of the orders whose stored names differ from the users table """
+
+    customer = aliased(User)
+    executor = aliased(User)
+
+    return session.execute(
+        select(Order.id)
+        .join(customer, customer.id == Order.customer_id, isouter=True)
+        .join(executor, executor.id == Order.executor_id, isouter=True)
+        .where(or_(
+            Order.customer_name.is_distinct_from(customer.full_name),
+            Order.executor_name.is_distinct_from(executor.full_name)
+        ))
+        .order_by(Order.id)
+    ).scalars().all()
+
+
+@click.command("rebuild-order-names")
+@with_appcontext
+def rebuild_order_names_command():
+    """ Rebuild the customer and executor names of the orders """
+
+    session: Session = db.session
+    with session():
+        rebuild_order_names(session)
+        bump_versions(session, "orders")
+        session.commit()
+
+    click.echo("Order names rebuilt.")
+
+
+@click.command("check-order-names")
+@with_appcontext
+def check_order_names_command():
+    """ Compare the names stored on orders with the users table """
+
+    session: Session = db.session
+    with session():
+        stale = check_order_names(session)
+
+    if stale:
+        click.echo(f"{len(stale)} orders with stale names: {', '.join(map(str, stale[:20]))}")
+        raise SystemExit(1)
+
+    click.echo("Order names are consistent.")
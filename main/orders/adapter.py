@@ -2,28 +2,105 @@
     orders blueprint
     adapter
 """
+from __future__ import annotations
 
 
 # global imports
 import datetime
+from collections import Counter
 
-from sqlalchemy import func, desc
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Query, aliased, Session
+from sqlalchemy.orm import Query, Session
 
 # local imports
 from app_custom_serialization import to_date
-from grm import BaseAdapter, to_dict_from_alchemy_model as to_dict
+from grm import \
+    BaseAdapter, BaseExportAdapter, get_serializer, \
+    order_by_keys, seek, next_cursor, batch_failed, flush_each, response_cache, loader
+from main.approvals import shift_approvals
+from main.counters import shift_counters
+from main.search import search_words, match_orders
+from main.versions import bump_versions
 from main.models import db, User, Order
-from main.models_checkers import check_description, check_date, check_address, check_price, check_pk
+from main.models_checkers import \
+    check_description, check_date, check_address, check_price, \
+    check_pk, check_batch
+
+
+# cached responses that show data written by this module
+cache_namespaces = ("users", "orders", "offers")
+
+
+# the stored names are returned as customer and executor in lists only
+order_fields = get_serializer(Order, [
+    "id", "name", "description", "start_date", "end_date", "address", "price", "customer_id", "executor_id"
+])
+
+
+def orders_query() -> Query:
+    """ Orders with the customer and executor names, read from the orders table alone """
+
+    return Order.query.with_entities(
+        Order,
+        Order.customer_name,
+        Order.executor_name
+    )
+
+
+def parse_day(value: str | None) -> datetime.date | None:
+    """ Date of a dd.mm.YYYY query parameter, None when missing or corrupt """
+
+    try:
+        return to_date(value).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_ranges(
+        query: Query,
+        price_min: int | None = None,
+        price_max: int | None = None,
+        start_from: str | None = None,
+        start_to: str | None = None,
+        end_from: str | None = None,
+        end_to: str | None = None
+) -> Query:
+    """ Orders of query within the given price and date ranges, bounds included """
+
+    start_from, start_to, end_from, end_to = map(parse_day, [start_from, start_to, end_from, end_to])
+
+    for column, low, high in [
+        (Order.price, price_min, price_max),
+        (Order.start_date, start_from, start_to),
+        (Order.end_date, end_from, end_to),
+    ]:
+        if low is not None:
+            query: Query = query.filter(column >= low)
+        if high is not None:
+            query: Query = query.filter(column <= high)
+
+    return query
+
+
+def order_row(row) -> dict:
+    """ Row of orders_query() as a dict """
+
+    return {
+        **order_fields(row[0]),
+        "customer": row[1],
+        "executor": row[2]
+    }
 
 
 class AllOrdersAdapter(BaseAdapter):
 
+    read_only = True
     filter_by_list = ["default", "customer", "executor"]
     order_by_list = ["default", "start", "start_asc", "end", "end_asc", "price", "price_asc"]
 
-    def __init__(self, limit=10, offset=0, filter_by="default", order_by="default", user_pk=None):
+    def __init__(self, limit=10, offset=0, filter_by="default", order_by="default", user_pk=None, cursor=None,
+                 **ranges):
 
         if limit < 1:
             limit = 10
@@ -37,18 +114,10 @@ class AllOrdersAdapter(BaseAdapter):
         if order_by not in self.order_by_list:
             order_by = self.order_by_list[0]
 
-        query: Query = Order.query
-
-        customer = aliased(User)
-        executor = aliased(User)
+        if self._from_cache("orders", limit, offset, filter_by, order_by, user_pk, cursor, *sorted(ranges.items())):
+            return
 
-        query = query.with_entities(
-            Order,
-            func.concat(customer.first_name, " ", customer.last_name),
-            func.concat(executor.first_name, " ", executor.last_name)
-        )\
-            .join(customer, customer.id == Order.customer_id, isouter=True)\
-            .join(executor, executor.id == Order.executor_id, isouter=True)
+        query: Query = filter_ranges(orders_query(), **ranges)
 
         if filter_by == "default":
             pass
@@ -57,47 +126,97 @@ class AllOrdersAdapter(BaseAdapter):
         elif filter_by == "executor" and type(user_pk) is int:
             query: Query = query.filter(Order.executor_id == user_pk)
 
+        descending = False
+
         if order_by == "default" or order_by == "start_asc":
-            query: Query = query.order_by(Order.start_date)
+            sort_keys = [Order.start_date]
         elif order_by == "start":
-            query: Query = query.order_by(desc(Order.start_date))
+            sort_keys, descending = [Order.start_date], True
         elif order_by == "end":
-            query: Query = query.order_by(desc(Order.end_date))
+            sort_keys, descending = [Order.end_date], True
         elif order_by == "end_asc":
-            query: Query = query.order_by(Order.end_date)
+            sort_keys = [Order.end_date]
         elif order_by == "price":
-            query: Query = query.order_by(desc(Order.price))
+            sort_keys, descending = [Order.price], True
         elif order_by == "price_asc":
-            query: Query = query.order_by(Order.price)
+            sort_keys = [Order.price]
+
+        sort_keys.append(Order.id)
+
+        if cursor is None:
+            query: Query = order_by_keys(query, sort_keys, descending).limit(limit).offset(offset)
+        else:
+            query: Query = seek(query, sort_keys, descending, cursor).limit(limit)
+
+        rows = query.all()
+
+        self._data = [order_row(row) for row in rows]
+
+        if cursor is not None:
+            self._data = {"items": self._data, "next_cursor": next_cursor(rows, sort_keys, limit)}
+
+
+class SearchOrdersAdapter(BaseAdapter):
+
+    read_only = True
+
+    def __init__(self, q="", limit=10, offset=0):
+
+        if limit < 1:
+            limit = 10
+
+        if offset < 0:
+            offset = 0
+
+        words = search_words(q)
+
+        if len(words) == 0:
+            self._data = []
+            return
+
+        if self._from_cache("orders", tuple(words), limit, offset):
+            return
+
+        query: Query = match_orders(orders_query(), words).limit(limit).offset(offset)
+
+        self._data = [order_row(row) for row in query.all()]
 
-        query: Query = query.limit(limit).offset(offset)
 
-        self._data = [{
-            **to_dict(row[0]),
-            "customer": row[1],
-            "executor": row[2]
-        } for row in query.all()]
+class ExportOrdersAdapter(BaseExportAdapter):
+
+    def __init__(self, export_format="ndjson"):
+        super().__init__(orders_query().order_by(Order.id), order_row, export_format)
 
 
 class OrderByPKAdapter(BaseAdapter):
 
+    read_only = True
+
     def __init__(self, pk):
 
         if pk < 1:
             self._data = None
             return
 
-        self._data = to_dict(Order.query.get(pk))
+        if self._from_cache("orders", pk):
+            return
+
+        self._data = order_fields(Order.query.get(pk))
 
 
 class PKOrderListAdapter(BaseAdapter):
 
-    def __init__(self, filter_by="default", user_pk=None):
+    read_only = True
+
+    def __init__(self, filter_by="default", user_pk=None, **ranges):
 
         if filter_by not in AllOrdersAdapter.filter_by_list:
             filter_by = AllOrdersAdapter.filter_by_list[0]
 
-        query: Query = Order.query.with_entities(func.count(Order.id))
+        if self._from_cache("orders", filter_by, user_pk, *sorted(ranges.items())):
+            return
+
+        query: Query = filter_ranges(Order.query.with_entities(func.count(Order.id)), **ranges)
 
         if filter_by == "default":
             pass
@@ -109,103 +228,207 @@ class PKOrderListAdapter(BaseAdapter):
         self._data = {"count": query.scalar(), "pk": user_pk}
 
 
+def check_new_order(json_object, start_date: datetime.datetime) -> str | None:
+    """ Error message for the fields of a new order """
+
+    if not isinstance(json_object, dict):
+        return "Wrong order type"
+
+    try:
+        end_date = to_date(json_object.get("end_date", None))
+    except (TypeError, ValueError) as exception:
+        return "End date is corrupt"
+
+    check_result = [result for result in [
+        check_description(json_object.get("description", None)),
+        check_date(end_date, start_date),
+        check_address(json_object.get("address", None)),
+        check_price(json_object.get("price", None)),
+        check_pk(json_object.get("customer_id", None)),
+        check_pk(json_object.get("executor_id", None))
+    ] if result is not None]
+
+    if len(check_result) != 0:
+        return "\n".join(check_result)
+
+
+def check_order_users(customer: User | None, executor: User | None) -> str | None:
+    """ Error message for the customer and the executor of an order """
+
+    if customer is None:
+        return "Customer not found"
+
+    if executor is None:
+        return "Executor not found"
+
+    if customer == executor:
+        return "You can't place an order for yourself"
+
+    if customer.role != "customer":
+        return "You are not a customer"
+
+    if executor.role != "executor":
+        return "You have chosen not the executor"
+
+
+def new_order(json_object, start_date: datetime.datetime, customer: User, executor: User) -> Order:
+    """ Order from a checked json object and its checked users """
+
+    description = json_object["description"]
+
+    return Order(
+        name=" ".join(description.strip().split()[:4]),
+        description=description,
+        start_date=start_date,
+        end_date=to_date(json_object["end_date"]),
+        address=json_object["address"],
+        price=json_object["price"],
+        customer_id=json_object["customer_id"],
+        executor_id=json_object["executor_id"],
+        customer_name=customer.full_name,
+        executor_name=executor.full_name
+    )
+
+
 class AddOrderAdapter(BaseAdapter):
 
     def __init__(self, json_object):
 
         start_date = datetime.datetime.today()
-        end_date = json_object.get("end_date", None)
-
-        try:
-            end_date = to_date(end_date)
-        except (TypeError, ValueError) as exception:
-            self._data = {
-                "status": "error",
-                "message": "End date is corrupt"
-            }
-            return
-
-        description = json_object.get("description", None)
-        address = json_object.get("address", None)
-        price = json_object.get("price", None)
-        customer_id = json_object.get("customer_id", None)
-        executor_id = json_object.get("executor_id", None)
 
-        check_result = [result for result in [
-            check_description(description),
-            check_date(end_date, start_date),
-            check_address(address),
-            check_price(price),
-            check_pk(customer_id),
-            check_pk(executor_id)
-        ] if result is not None]
+        check_result = check_new_order(json_object, start_date)
 
-        if len(check_result) != 0:
+        if check_result is not None:
             self._data = {
                 "status": "error",
-                "message": "\n".join(check_result)
+                "message": check_result
             }
             return
 
+        customer_id = json_object["customer_id"]
+        executor_id = json_object["executor_id"]
+
         try:
-            customer: User = User.query.get(customer_id)
-            if customer is None:
-                raise SQLAlchemyError()
-        except SQLAlchemyError as exception:
+            users = loader(User).load(customer_id, executor_id)
+        except SQLAlchemyError:
             self._data = {
                 "status": "error",
                 "message": "Customer not found"
             }
             return
 
-        try:
-            executor: User = User.query.get(executor_id)
-            if executor is None:
-                raise SQLAlchemyError()
-        except SQLAlchemyError as exception:
-            self._data = {
-                "status": "error",
-                "message": "Executor not found"
-            }
-            return
+        check_result = check_order_users(users[customer_id], users[executor_id])
 
-        if customer == executor:
+        if check_result is not None:
             self._data = {
                 "status": "error",
-                "message": "You can't place an order for yourself"
+                "message": check_result
             }
             return
 
-        if customer.role != "customer":
+        session: Session = db.session
+        with session():
+
+            try:
+                session.add(new_order(json_object, start_date, users[customer_id], users[executor_id]))
+
+                shift_counters(session, customer_id, orders_owner=1)
+                shift_counters(session, executor_id, orders_executor=1)
+
+                bump_versions(session, "orders")
+                session.commit()
+
+            except SQLAlchemyError as exception:
+                session.rollback()
+                self._data = {
+                    "status": "error",
+                    "message": str(exception)
+                }
+                return
+
+        response_cache.invalidate(*cache_namespaces)
+        self._data = {"status": "ok", "message": None}
+
+
+class AddOrdersBatchAdapter(BaseAdapter):
+
+    batch_limit = 1000
+
+    def __init__(self, json_list):
+
+        check_result = check_batch(json_list, self.batch_limit)
+
+        if isinstance(check_result, str):
             self._data = {
                 "status": "error",
-                "message": "You are not a customer"
+                "message": check_result
             }
             return
 
-        if executor.role != "executor":
+        start_date = datetime.datetime.today()
+
+        items = []
+        checked = []
+
+        for index, json_object in enumerate(json_list):
+            check_result = check_new_order(json_object, start_date)
+
+            if check_result is not None:
+                items.append({"status": "error", "message": check_result, "id": None})
+                continue
+
+            checked.append(index)
+            items.append({"status": "ok", "message": None, "id": None})
+
+        user_ids = {json_list[index][key] for index in checked for key in ["customer_id", "executor_id"]}
+
+        try:
+            users = loader(User).load(*user_ids)
+        except SQLAlchemyError as exception:
             self._data = {
                 "status": "error",
-                "message": "You have chosen not the executor"
+                "message": str(exception)
             }
             return
 
+        orders = {}
+
+        for index in checked:
+            json_object = json_list[index]
+
+            check_result = check_order_users(
+                users.get(json_object["customer_id"]),
+                users.get(json_object["executor_id"])
+            )
+
+            if check_result is not None:
+                items[index] = {"status": "error", "message": check_result, "id": None}
+                continue
+
+            orders[index] = new_order(
+                json_object, start_date,
+                users[json_object["customer_id"]],
+                users[json_object["executor_id"]]
+            )
+
         session: Session = db.session
         with session():
 
             try:
-                session.add(
-                    Order(
-                        name=" ".join(description.strip().split()[:4]),
-                        description=description,
-                        start_date=start_date,
-                        end_date=end_date,
-                        address=address,
-                        price=price,
-                        customer_id=customer_id,
-                        executor_id=executor_id
+                # the version bump is the first write, so on SQLite as well the
+                # savepoints of the items nest in the batch transaction
+                bump_versions(session, "orders")
+                saved = flush_each(session, orders, items).values()
+
+                orders_owner = Counter(order.customer_id for order in saved)
+                orders_executor = Counter(order.executor_id for order in saved)
+
+                for user_id in orders_owner.keys() | orders_executor.keys():
+                    shift_counters(
+                        session, user_id,
+                        orders_owner=orders_owner[user_id],
+                        orders_executor=orders_executor[user_id]
                     )
-                )
 
                 session.commit()
 
@@ -213,11 +436,13 @@ class AddOrderAdapter(BaseAdapter):
                 session.rollback()
                 self._data = {
                     "status": "error",
-                    "message": str(exception)
+                    "message": str(exception),
+                    "items": batch_failed(items)
                 }
                 return
 
-        self._data = {"status": "ok", "message": None}
+        response_cache.invalidate(*cache_namespaces)
+        self._data = {"status": "ok", "message": None, "items": items}
 
 
 class UpdateOrderAdapter(BaseAdapter):
@@ -233,7 +458,7 @@ class UpdateOrderAdapter(BaseAdapter):
             return
 
         try:
-            order: Order = Order.query.get(pk)
+            order: Order = loader(Order).get(pk)
             if order is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -273,6 +498,9 @@ class UpdateOrderAdapter(BaseAdapter):
             }
             return
 
+        old_customer_id = order.customer_id
+        old_executor_id = order.executor_id
+
         if description:
             order.description = description
             order.name = " ".join(description.strip().split()[:4])
@@ -286,33 +514,31 @@ class UpdateOrderAdapter(BaseAdapter):
         if price:
             order.price = price
 
-        if customer_id:
-            try:
-                customer: User = User.query.get(customer_id)
-                if customer is None:
-                    raise SQLAlchemyError()
-            except SQLAlchemyError as exception:
-                self._data = {
-                    "status": "error",
-                    "message": "Customer not found"
-                }
-                return
-        else:
-            customer = User.query.get(order.customer_id)
+        try:
+            users = loader(User).load(customer_id or order.customer_id, executor_id or order.executor_id)
+        except SQLAlchemyError:
+            self._data = {
+                "status": "error",
+                "message": "Customer not found"
+            }
+            return
 
-        if executor_id:
-            try:
-                executor: User = User.query.get(executor_id)
-                if executor is None:
-                    raise SQLAlchemyError()
-            except SQLAlchemyError as exception:
-                self._data = {
-                    "status": "error",
-                    "message": "Customer not found"
-                }
-                return
-        else:
-            executor = User.query.get(order.executor_id)
+        customer: User = users[customer_id or order.customer_id]
+        executor: User = users[executor_id or order.executor_id]
+
+        if customer_id and customer is None:
+            self._data = {
+                "status": "error",
+                "message": "Customer not found"
+            }
+            return
+
+        if executor_id and executor is None:
+            self._data = {
+                "status": "error",
+                "message": "Customer not found"
+            }
+            return
 
         if customer_id or executor_id:
             if customer == executor:
@@ -330,6 +556,7 @@ class UpdateOrderAdapter(BaseAdapter):
                 }
                 return
             order.customer_id = customer_id
+            order.customer_name = customer.full_name
 
         if executor_id:
             if executor.role != "executor":
@@ -339,12 +566,25 @@ class UpdateOrderAdapter(BaseAdapter):
                 }
                 return
             order.executor_id = executor_id
+            order.executor_name = executor.full_name
 
         session: Session = db.session
         with session():
 
             try:
                 session.add(order)
+
+                if order.customer_id != old_customer_id:
+                    shift_counters(session, old_customer_id, orders_owner=-1)
+                    shift_counters(session, order.customer_id, orders_owner=1)
+
+                if order.executor_id != old_executor_id:
+                    shift_counters(session, old_executor_id, orders_executor=-1)
+                    shift_counters(session, order.executor_id, orders_executor=1)
+                    shift_approvals(session, order.id, order.executor_id)
+                    bump_versions(session, "offers")
+
+                bump_versions(session, "orders")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -355,6 +595,7 @@ class UpdateOrderAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
 
 
@@ -372,7 +613,7 @@ class DeleteOrderAdapter(BaseAdapter):
             return
 
         try:
-            order = Order.query.get(pk)
+            order = loader(Order).get(pk)
             if order is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -386,6 +627,9 @@ class DeleteOrderAdapter(BaseAdapter):
         with session():
             try:
                 session.delete(order)
+                shift_counters(session, order.customer_id, orders_owner=-1)
+                shift_counters(session, order.executor_id, orders_executor=-1)
+                bump_versions(session, "orders")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -396,4 +640,5 @@ class DeleteOrderAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
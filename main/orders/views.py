@@ -9,18 +9,36 @@ from flask import Blueprint, request, current_app
 
 
 # local imports
+from main.versions import conditional
 from .adapter import \
     AllOrdersAdapter, \
+    SearchOrdersAdapter, \
+    ExportOrdersAdapter, \
     OrderByPKAdapter, \
     PKOrderListAdapter, \
     AddOrderAdapter, \
+    AddOrdersBatchAdapter, \
     UpdateOrderAdapter, \
     DeleteOrderAdapter
 
 bp_orders = Blueprint("bp_orders", __name__)
 
 
+def range_args() -> dict:
+    """ Price and date range filters of the request, dates as dd.mm.YYYY """
+
+    return {
+        "price_min": request.args.get("price_min", None, type=int),
+        "price_max": request.args.get("price_max", None, type=int),
+        "start_from": request.args.get("start_from", None, type=str),
+        "start_to": request.args.get("start_to", None, type=str),
+        "end_from": request.args.get("end_from", None, type=str),
+        "end_to": request.args.get("end_to", None, type=str),
+    }
+
+
 @bp_orders.route("/", methods=["GET"])
+@conditional("orders", "users")
 def index_all_orders():
 
     limit = request.args.get("limit", 5, type=int)
@@ -28,14 +46,41 @@ def index_all_orders():
     filter_by = request.args.get("filter_by", "default", type=str)
     order_by = request.args.get("order_by", "default", type=str)
     user_pk = request.args.get("user_pk", None, type=int)
+    cursor = request.args.get("cursor", None, type=str)
+
+    with current_app.app_context():
+        json_object = AllOrdersAdapter(limit, offset, filter_by, order_by, user_pk, cursor, **range_args()).jsonify()
+
+    return json_object, 200
+
+
+@bp_orders.route("/search", methods=["GET"])
+@conditional("orders", "users")
+def index_search_orders():
+
+    q = request.args.get("q", "", type=str)
+    limit = request.args.get("limit", 5, type=int)
+    offset = request.args.get("offset", 0, type=int)
 
     with current_app.app_context():
-        json_object = AllOrdersAdapter(limit, offset, filter_by, order_by, user_pk).jsonify()
+        json_object = SearchOrdersAdapter(q, limit, offset).jsonify()
 
     return json_object, 200
 
 
+@bp_orders.route("/export", methods=["GET"])
+def index_export_orders():
+
+    export_format = request.args.get("format", "ndjson", type=str)
+
+    with current_app.app_context():
+        response = ExportOrdersAdapter(export_format).stream()
+
+    return response, 200
+
+
 @bp_orders.route("/<int:pk>", methods=["GET"])
+@conditional("orders")
 def index_order_by_pk(pk):
 
     with current_app.app_context():
@@ -45,13 +90,14 @@ def index_order_by_pk(pk):
 
 
 @bp_orders.route("/count", methods=["GET"])
+@conditional("orders")
 def index_get_orders_count():
 
     filter_by = request.args.get("filter_by", "default", type=str)
     user_pk = request.args.get("user_pk", None, type=int)
 
     with current_app.app_context():
-        json_object = PKOrderListAdapter(filter_by, user_pk).jsonify()
+        json_object = PKOrderListAdapter(filter_by, user_pk, **range_args()).jsonify()
 
     return json_object, 200
 
@@ -65,6 +111,15 @@ def index_add_new_order():
     return json_object, 200
 
 
+@bp_orders.route("/batch", methods=["POST"])
+def index_add_orders_batch():
+
+    with current_app.app_context():
+        json_object = AddOrdersBatchAdapter(request.json).jsonify()
+
+    return json_object, 200
+
+
 @bp_orders.route("/<int:pk>", methods=["PUT"])
 def index_update_order_by_pk(pk):
 
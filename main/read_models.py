@@ -0,0 +1,26 @@
+"""
+    Main blueprint
+    read models derived from the users, orders and offers tables
+"""
+
+# global imports
+from sqlalchemy.orm import Session
+
+# local imports
+from main.approvals import rebuild_approvals
+from main.counters import rebuild_counters
+from main.order_names import rebuild_order_names
+from main.versions import bump_versions
+
+
+def rebuild_read_models(session: Session):
+    """ Rebuild every derived table and column after a bulk load, inside the current transaction
+
+    Bulk loads skip the adapters that keep the read models up to date, so
+    every loader calls this once its rows are in.
+    """
+
+    rebuild_counters(session)
+    rebuild_approvals(session)
+    rebuild_order_names(session)
+    bump_versions(session, "users", "orders", "offers")
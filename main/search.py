@@ -0,0 +1,105 @@
+"""
+    Main blueprint
+    orders full-text search
+"""
+
+# global imports
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DDL, event, func, desc, literal_column, table, column, text
+from sqlalchemy.orm import Query, Session
+
+# local imports
+from main.models import db, Order
+
+
+# Postgres: a GIN index over the document expression, kept up to date by
+# Postgres itself. The query repeats the expression with literals so the
+# planner matches it to the index.
+postgres_document = func.to_tsvector(
+    literal_column("'simple'::regconfig"),
+    Order.name + literal_column("' '") + Order.description + literal_column("' '") + Order.address
+)
+
+postgres_ddl = [
+    "CREATE INDEX IF NOT EXISTS ix_orders_search ON orders USING gin "
+    "(to_tsvector('simple'::regconfig, name || ' ' || description || ' ' || address))",
+]
+
+# SQLite: an FTS5 table over the orders columns, kept up to date by triggers
+sqlite_ddl = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS orders_search USING fts5"
+    "(name, description, address, content='orders', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS orders_search_insert AFTER INSERT ON orders BEGIN "
+    "INSERT INTO orders_search (rowid, name, description, address) "
+    "VALUES (new.id, new.name, new.description, new.address); END",
+    "CREATE TRIGGER IF NOT EXISTS orders_search_delete AFTER DELETE ON orders BEGIN "
+    "INSERT INTO orders_search (orders_search, rowid, name, description, address) "
+    "VALUES ('delete', old.id, old.name, old.description, old.address); END",
+    "CREATE TRIGGER IF NOT EXISTS orders_search_update AFTER UPDATE OF name, description, address ON orders BEGIN "
+    "INSERT INTO orders_search (orders_search, rowid, name, description, address) "
+    "VALUES ('delete', old.id, old.name, old.description, old.address); "
+    "INSERT INTO orders_search (rowid, name, description, address) "
+    "VALUES (new.id, new.name, new.description, new.address); END",
+]
+
+orders_search = table("orders_search", column("rowid"), column("orders_search"), column("rank"))
+
+for statement in postgres_ddl:
+    event.listen(Order.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for statement in sqlite_ddl:
+    event.listen(Order.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+event.listen(Order.__table__, "before_drop", DDL("DROP TABLE IF EXISTS orders_search").execute_if(dialect="sqlite"))
+
+
+def search_words(q: str) -> list:
+    """ Words of a search string, operators and punctuation dropped """
+
+    return re.findall(r"\w+", q or "")
+
+
+def match_orders(query: Query, words: list) -> Query:
+    """ Orders of query that contain all words, best ranked first """
+
+    if db.engine.dialect.name == "postgresql":
+        ts_query = func.plainto_tsquery(literal_column("'simple'::regconfig"), " ".join(words))
+
+        return query\
+            .filter(postgres_document.op("@@")(ts_query))\
+            .order_by(desc(func.ts_rank(postgres_document, ts_query)), Order.id)
+
+    return query\
+        .join(orders_search, orders_search.c.rowid == Order.id)\
+        .filter(orders_search.c.orders_search.op("MATCH")(" ".join(f'"{word}"' for word in words)))\
+        .order_by(orders_search.c.rank, Order.id)
+
+
+def rebuild_search(session: Session):
+    """ Create the search index if it is missing and fill it from the orders table """
+
+    if db.engine.dialect.name == "postgresql":
+        for statement in postgres_ddl:
+            session.execute(text(statement))
+        return
+
+    for statement in sqlite_ddl:
+        session.execute(text(statement))
+
+    session.execute(text("INSERT INTO orders_search (orders_search) VALUES ('rebuild')"))
+
+
+@click.command("rebuild-search")
+@with_appcontext
+def rebuild_search_command():
+    """ Rebuild the orders full-text search index """
+
+    session: Session = db.session
+    with session():
+        rebuild_search(session)
+        session.commit()
+
+    click.echo("Search index rebuilt.")
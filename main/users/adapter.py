@@ -2,27 +2,64 @@
     users blueprint
     adapter
 """
+from __future__ import annotations
 
 # global imports
 from typing import Optional
 
-from sqlalchemy import func, desc
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Query, aliased, Session
+from sqlalchemy.orm import Query, Session
 
 # local imports
-from grm import BaseAdapter, to_dict_from_alchemy_model as to_dict
-from main.models import db, User, Order, Offer
+from grm import \
+    BaseAdapter, BaseExportAdapter, get_serializer, \
+    order_by_keys, seek, next_cursor, batch_failed, flush_each, response_cache, loader
+from main.order_names import rename_user
+from main.versions import bump_versions
+from main.models import db, User, UserCounter, full_name
 from main.models_checkers import \
     check_name, check_age, check_email, check_role, \
-    check_phone, check_pk
+    check_phone, check_pk, check_batch, validate_users
+
+
+# cached responses that show data written by this module
+cache_namespaces = ("users", "orders", "offers")
+
+# full_name is a sort key for the orders and offers lists, not a user field
+user_fields = get_serializer(User, ["id", "first_name", "last_name", "age", "email", "role", "phone"])
+
+
+def users_query() -> Query:
+    """ Users with their counters """
+
+    return User.query.with_entities(
+        User,
+        UserCounter.orders_owner,
+        UserCounter.orders_executor,
+        UserCounter.offers_total) \
+        .join(UserCounter, UserCounter.user_id == User.id)
+
+
+def user_row(row) -> dict:
+    """ Row of users_query() as a dict """
+
+    return {
+        **user_fields(row[0]),
+        "orders_owner": row[1],
+        "orders_executor": row[2],
+        "offers_total": row[3]
+    }
 
 
 class AllUsersAdapter(BaseAdapter):
+    read_only = True
     filter_by_list = ["default", "customer", "executor"]
-    order_by_list = ["default", "age", "age_asc", "owner", "owner_asc", "executor", "executor_asc", "offers"]
+    order_by_list = [
+        "default", "age", "age_asc", "owner", "owner_asc", "executor", "executor_asc", "offers", "offers_asc"
+    ]
 
-    def __init__(self, limit=5, offset=0, filter_by="default", order_by="default"):
+    def __init__(self, limit=5, offset=0, filter_by="default", order_by="default", cursor=None):
 
         if limit < 1:
             limit = 5
@@ -36,19 +73,10 @@ class AllUsersAdapter(BaseAdapter):
         if order_by not in self.order_by_list:
             order_by = self.order_by_list[0]
 
-        query: Query = User.query
-
-        orders_owner = aliased(Order)
-        orders_executor = aliased(Order)
+        if self._from_cache("users", limit, offset, filter_by, order_by, cursor):
+            return
 
-        query = query.with_entities(
-            User,
-            func.count(orders_owner.id),
-            func.count(orders_executor.id),
-            func.count(Offer.id)) \
-            .join(orders_owner, orders_owner.customer_id == User.id, isouter=True) \
-            .join(orders_executor, orders_executor.executor_id == User.id, isouter=True) \
-            .join(Offer, Offer.executor_id == User.id, isouter=True)
+        query: Query = users_query()
 
         if filter_by == "default":
             pass
@@ -57,57 +85,75 @@ class AllUsersAdapter(BaseAdapter):
         elif filter_by == "executor":
             query: Query = query.filter(User.role == "executor")
 
-        query: Query = query.group_by(User.id)
+        descending = False
 
         if order_by == "default":
-            query: Query = query.order_by(User.first_name, User.last_name)
+            sort_keys = [User.first_name, User.last_name]
         elif order_by == "age":
-            query: Query = query.order_by(desc(User.age))
+            sort_keys, descending = [User.age], True
         elif order_by == "age_asc":
-            query: Query = query.order_by(User.age)
+            sort_keys = [User.age]
         elif order_by == "owner":
-            query: Query = query.order_by(desc(func.count(orders_owner.id)))
+            sort_keys, descending = [UserCounter.orders_owner], True
         elif order_by == "owner_asc":
-            query: Query = query.order_by(func.count(orders_owner.id))
+            sort_keys = [UserCounter.orders_owner]
         elif order_by == "executor":
-            query: Query = query.order_by(desc(func.count(orders_executor.id)))
+            sort_keys, descending = [UserCounter.orders_executor], True
         elif order_by == "executor_asc":
-            query: Query = query.order_by(func.count(orders_executor.id))
+            sort_keys = [UserCounter.orders_executor]
         elif order_by == "offers":
-            query: Query = query.order_by(desc(func.count(Offer.id)))
+            sort_keys, descending = [UserCounter.offers_total], True
         elif order_by == "offers_asc":
-            query: Query = query.order_by(func.count(Offer.id))
+            sort_keys = [UserCounter.offers_total]
 
-        query: Query = query.limit(limit).offset(offset)
+        sort_keys.append(User.id)
 
-        self._data = [
-            {
-                **to_dict(row[0]),
-                "orders_owner": row[1],
-                "orders_executor": row[2],
-                "offers_total": row[3]
-            }
-            for row in query.all()
-        ]
+        if cursor is None:
+            query: Query = order_by_keys(query, sort_keys, descending).limit(limit).offset(offset)
+        else:
+            query: Query = seek(query, sort_keys, descending, cursor).limit(limit)
+
+        rows = query.all()
+
+        self._data = [user_row(row) for row in rows]
+
+        if cursor is not None:
+            self._data = {"items": self._data, "next_cursor": next_cursor(rows, sort_keys, limit)}
+
+
+class ExportUsersAdapter(BaseExportAdapter):
+
+    def __init__(self, export_format="ndjson"):
+        super().__init__(users_query().order_by(User.id), user_row, export_format)
 
 
 class UserByPKAdapter(BaseAdapter):
 
+    read_only = True
+
     def __init__(self, pk):
         if pk < 1:
             self._data = None
             return
 
-        self._data = to_dict(User.query.get(pk))
+        if self._from_cache("users", pk):
+            return
+
+        self._data = user_fields(User.query.get(pk))
 
 
 class PKUserListAdapter(BaseAdapter):
 
+    read_only = True
+
     def __init__(self, filter_by="default"):
 
         if filter_by not in AllUsersAdapter.filter_by_list:
             filter_by = AllUsersAdapter.filter_by_list[0]
 
+        if self._from_cache("users", filter_by):
+            return
+
         query: Query = User.query
         query = query.with_entities(func.count(User.id))
 
@@ -122,25 +168,32 @@ class PKUserListAdapter(BaseAdapter):
         self._data = {"count": query.scalar()}
 
 
+def check_user(json_object) -> list[str]:
+    """ All error messages for a new user """
+
+    return validate_users([json_object])[0]
+
+
+def new_user(json_object) -> User:
+    """ User with empty counters from a checked json object """
+
+    return User(
+        first_name=json_object["first_name"],
+        last_name=json_object["last_name"],
+        full_name=full_name(json_object["first_name"], json_object["last_name"]),
+        age=json_object["age"],
+        email=json_object["email"],
+        role=json_object["role"],
+        phone=json_object["phone"],
+        counters=UserCounter(orders_owner=0, orders_executor=0, offers_total=0),
+    )
+
+
 class AddUserAdapter(BaseAdapter):
 
     def __init__(self, json_object):
 
-        first_name = json_object.get("first_name", None)
-        last_name = json_object.get("last_name", None)
-        age = json_object.get("age", None)
-        email = json_object.get("email", None)
-        role = json_object.get("role", None)
-        phone = json_object.get("phone", None)
-
-        check_result = [result for result in [
-            check_name(first_name),
-            check_name(last_name),
-            check_age(age),
-            check_email(email),
-            check_role(role),
-            check_phone(phone)
-        ] if result is not None]
+        check_result = check_user(json_object)
 
         if len(check_result) != 0:
             self._data = {
@@ -153,17 +206,9 @@ class AddUserAdapter(BaseAdapter):
         with session():
 
             try:
-                session.add(
-                    User(
-                        first_name=json_object["first_name"],
-                        last_name=json_object["last_name"],
-                        age=json_object["age"],
-                        email=json_object["email"],
-                        role=json_object["role"],
-                        phone=json_object["phone"],
-                    )
-                )
+                session.add(new_user(json_object))
 
+                bump_versions(session, "users")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -174,9 +219,60 @@ class AddUserAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
 
 
+class AddUsersBatchAdapter(BaseAdapter):
+
+    batch_limit = 1000
+
+    def __init__(self, json_list):
+
+        check_result = check_batch(json_list, self.batch_limit)
+
+        if isinstance(check_result, str):
+            self._data = {
+                "status": "error",
+                "message": check_result
+            }
+            return
+
+        items = []
+        users = {}
+
+        for index, (json_object, check_result) in enumerate(zip(json_list, validate_users(json_list))):
+
+            if len(check_result) != 0:
+                items.append({"status": "error", "message": "\n".join(check_result), "id": None})
+                continue
+
+            users[index] = new_user(json_object)
+            items.append({"status": "ok", "message": None, "id": None})
+
+        session: Session = db.session
+        with session():
+
+            try:
+                # the version bump is the first write, so on SQLite as well the
+                # savepoints of the items nest in the batch transaction
+                bump_versions(session, "users")
+                flush_each(session, users, items)
+                session.commit()
+
+            except SQLAlchemyError as exception:
+                session.rollback()
+                self._data = {
+                    "status": "error",
+                    "message": str(exception),
+                    "items": batch_failed(items)
+                }
+                return
+
+        response_cache.invalidate(*cache_namespaces)
+        self._data = {"status": "ok", "message": None, "items": items}
+
+
 class UpdateUserAdapter(BaseAdapter):
 
     def __init__(self, json_object, pk):
@@ -221,7 +317,7 @@ class UpdateUserAdapter(BaseAdapter):
             return
 
         try:
-            user = User.query.get(pk)
+            user = loader(User).get(pk)
             if user is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -237,6 +333,9 @@ class UpdateUserAdapter(BaseAdapter):
         if last_name:
             user.last_name = last_name
 
+        old_full_name = user.full_name
+        user.full_name = full_name(user.first_name, user.last_name)
+
         if age:
             user.age = age
 
@@ -253,6 +352,12 @@ class UpdateUserAdapter(BaseAdapter):
         with session():
             try:
                 session.add(user)
+
+                if user.full_name != old_full_name:
+                    rename_user(session, user.id, user.full_name)
+                    bump_versions(session, "orders")
+
+                bump_versions(session, "users")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -263,6 +368,7 @@ class UpdateUserAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
 
 
@@ -280,7 +386,7 @@ class DeleteUserAdapter(BaseAdapter):
             return
 
         try:
-            user = User.query.get(pk)
+            user = loader(User).get(pk)
             if user is None:
                 raise SQLAlchemyError()
         except SQLAlchemyError as exception:
@@ -294,6 +400,7 @@ class DeleteUserAdapter(BaseAdapter):
         with session():
             try:
                 session.delete(user)
+                bump_versions(session, "users")
                 session.commit()
 
             except SQLAlchemyError as exception:
@@ -304,4 +411,5 @@ class DeleteUserAdapter(BaseAdapter):
                 }
                 return
 
+        response_cache.invalidate(*cache_namespaces)
         self._data = {"status": "ok", "message": None}
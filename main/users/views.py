@@ -9,11 +9,14 @@ from flask import Blueprint, current_app, request
 
 
 # local imports
+from main.versions import conditional
 from .adapter import \
     AllUsersAdapter, \
+    ExportUsersAdapter, \
     UserByPKAdapter, \
     PKUserListAdapter, \
     AddUserAdapter, \
+    AddUsersBatchAdapter, \
     UpdateUserAdapter, \
     DeleteUserAdapter
 
@@ -22,20 +25,34 @@ bp_users = Blueprint("bp_users", __name__)
 
 
 @bp_users.route("/", methods=["GET"])
+@conditional("users", "orders", "offers")
 def index_all_users():
 
     limit = request.args.get("limit", 5, type=int)
     offset = request.args.get("offset", 0, type=int)
     filter_by = request.args.get("filter_by", "default", type=str)
     order_by = request.args.get("order_by", "default", type=str)
+    cursor = request.args.get("cursor", None, type=str)
 
     with current_app.app_context():
-        json_object = AllUsersAdapter(limit, offset, filter_by, order_by).jsonify()
+        json_object = AllUsersAdapter(limit, offset, filter_by, order_by, cursor).jsonify()
 
     return json_object, 200
 
 
+@bp_users.route("/export", methods=["GET"])
+def index_export_users():
+
+    export_format = request.args.get("format", "ndjson", type=str)
+
+    with current_app.app_context():
+        response = ExportUsersAdapter(export_format).stream()
+
+    return response, 200
+
+
 @bp_users.route("/<int:pk>", methods=["GET"])
+@conditional("users")
 def index_user_by_pk(pk):
 
     with current_app.app_context():
@@ -45,6 +62,7 @@ def index_user_by_pk(pk):
 
 
 @bp_users.route("/count", methods=["GET"])
+@conditional("users")
 def index_get_users_count():
 
     filter_by = request.args.get("filter_by", "default", type=str)
@@ -64,6 +82,15 @@ def index_add_new_user():
     return json_object, 200
 
 
+@bp_users.route("/batch", methods=["POST"])
+def index_add_users_batch():
+
+    with current_app.app_context():
+        json_object = AddUsersBatchAdapter(request.json).jsonify()
+
+    return json_object, 200
+
+
 @bp_users.route("/<int:pk>", methods=["PUT"])
 def index_update_user_by_pk(pk):
 
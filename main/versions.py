@@ -0,0 +1,96 @@
+"""
+    Main blueprint
+    tables change versions and ETags
+"""
+
+# global imports
+import hashlib
+from functools import wraps
+
+from flask import request, make_response, current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# local imports
+from grm import replica, response_cache
+from main.models import TableVersion
+
+
+# dialects with INSERT ... ON CONFLICT DO UPDATE
+upsert_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def bump_versions(session: Session, *tables: str):
+    """ Increment the change versions of the tables inside the current transaction
+
+    One upsert per table, so two first writes to a table cannot both
+    insert its row. Tables are bumped in name order, the same row lock
+    order in every transaction.
+    """
+
+    insert = upsert_inserts.get(session.get_bind(TableVersion.__mapper__).dialect.name)
+
+    for table in sorted(set(tables)):
+
+        if insert is not None:
+            session.execute(
+                insert(TableVersion)
+                .values(name=table, version=1)
+                .on_conflict_do_update(
+                    index_elements=[TableVersion.name],
+                    set_={"version": TableVersion.version + 1}
+                )
+            )
+            continue
+
+        updated = session.query(TableVersion)\
+            .filter(TableVersion.name == table)\
+            .update({TableVersion.version: TableVersion.version + 1}, synchronize_session=False)
+
+        if not updated:
+            session.add(TableVersion(name=table, version=1))
+
+
+def current_versions(*tables: str) -> tuple:
+    """ Change versions of the tables, 0 for tables that were never written """
+
+    versions = dict(
+        TableVersion.query
+        .with_entities(TableVersion.name, TableVersion.version)
+        .filter(TableVersion.name.in_(tables))
+        .all()
+    )
+
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def conditional(*tables: str):
+    """ Strong ETag for a GET view from its URL and the change versions of the tables it reads
+
+    A request with a matching If-None-Match gets 304 without running the view.
+    """
+
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+
+            # from the database the view reads, so the ETag matches the body
+            with replica.reading():
+                target = replica.target()
+                versions = current_versions(*tables)
+            etag = hashlib.sha1(f"{request.full_path}|{target}|{versions}".encode("utf-8")).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                # a body cached before a write of another worker has other versions
+                with response_cache.versioned((target, versions)):
+                    response = make_response(view(*args, **kwargs))
+
+            response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -11,10 +11,13 @@ from flask import Blueprint
 from .users.views import bp_users
 from .orders.views import bp_orders
 from .offers.views import bp_offers
+from .internal.views import bp_internal, bp_metrics
 
 bp_main = Blueprint("bp_main", __name__)
 
 bp_main.register_blueprint(bp_users, url_prefix="/users/")
 bp_main.register_blueprint(bp_orders, url_prefix="/orders/")
 bp_main.register_blueprint(bp_offers, url_prefix="/offers/")
+bp_main.register_blueprint(bp_internal, url_prefix="/_internal/")
+bp_main.register_blueprint(bp_metrics)
 
@@ -0,0 +1,48 @@
+"""
+    fixtures: apps on freshly generated SQLite databases
+"""
+
+# global imports
+import pytest
+
+# local imports
+import app_generate
+from main.generator import GeneratorConfig, load_pools
+
+
+@pytest.fixture
+def database_uri(tmp_path, monkeypatch) -> str:
+    """ DB_URI of an empty SQLite file, the replica left unconfigured """
+
+    uri = f"sqlite:///{tmp_path / 'primary.sqlite3'}"
+
+    monkeypatch.setenv("DB_URI", uri)
+    monkeypatch.delenv("DB_REPLICA_URI", raising=False)
+
+    return uri
+
+
+@pytest.fixture
+def generate_app(database_uri):
+    """ Fill the database with generated rows and build an app on it """
+
+    from app import create_app
+    from grm import response_cache
+
+    def generate(users: int = 300):
+        app_generate.to_database(GeneratorConfig(users=users), load_pools(), replace=False, check=False)
+        return create_app()
+
+    response_cache.clear()
+    yield generate
+    response_cache.clear()
+
+
+@pytest.fixture
+def generated_app(generate_app):
+    return generate_app()
+
+
+@pytest.fixture
+def client(generated_app):
+    return generated_app.test_client()
@@ -0,0 +1,74 @@
+"""
+    reference implementations the models checkers are tested against
+"""
+from __future__ import annotations
+
+# global imports
+import operator
+import random
+from functools import reduce
+
+
+def reduce_check_name(name: str) -> str | None:
+    """ check_name before the single pass rewrite, kept as the reference """
+
+    if not name or not isinstance(name, str):
+        return "No name or wrong type"
+
+    name = name.lower()
+
+    result = reduce(
+        operator.add,
+        [not (
+                ("a" <= character <= "z") or
+                ("а" <= character <= "я") or
+                character in "'"
+        ) for character in name]
+    )
+
+    if result > 0:
+        return "There are wrong symbols inside"
+
+    result = name.count(" ")
+
+    if result > 0:
+        return "There are more than zero spaces"
+
+    result = reduce(
+        lambda acc, item: (acc[0] + item[0], acc[1] + item[1]),
+        [(
+            ("a" <= character <= "z"),
+            ("а" <= character <= "я")
+        ) for character in name]
+    )
+
+    if result[0] and result[1]:
+        return "There are ru and en characters inside"
+
+    result = max(reduce(
+        lambda acc, item: (acc[0] + 1, *acc[1:], ) if item in "aeiouyаеёиоуыэюя" else (0, *acc),
+        [character for character in name],
+        (0,)
+    ))
+
+    if result > 2:
+        return "There are more than 2 vowels in a row"
+
+    result = max(reduce(
+        lambda acc, item: (acc[0] + 1, *acc[1:],) if item not in "aeiouyаеёиоуыэюя'" else (0, *acc),
+        [character for character in name],
+        (0,)
+    ))
+
+    if result > 2:
+        return "There are more than 2 consonants in a row"
+
+
+alphabet = "abeiouyzAEZаеёиоуыэюябвгЯЁ' 1-"
+
+
+def random_names(generator: random.Random, count: int, max_length: int = 12) -> list:
+    return [
+        "".join(generator.choice(alphabet) for _ in range(generator.randint(0, max_length)))
+        for _ in range(count)
+    ]
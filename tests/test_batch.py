@@ -0,0 +1,82 @@
+"""
+    batch inserts: one flush, per-item savepoints only when it fails
+"""
+
+# global imports
+from sqlalchemy import event
+
+# local imports
+from main.models import db
+
+
+def new_users(count: int) -> list:
+    return [{
+        "first_name": "Hudson",
+        "last_name": "Pauloh",
+        "age": 31,
+        "email": "hudson@mymail.com",
+        "role": "executor",
+        "phone": f"+1 555 000 {index:04d}",
+    } for index in range(count)]
+
+
+def post_counting_savepoints(app, path: str, json_list: list):
+    """ Response of the POST and the number of savepoints it opened """
+
+    client = app.test_client()
+
+    with app.app_context():
+        engine = db.engine
+
+    savepoints = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SAVEPOINT"):
+            savepoints.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.post(path, json=json_list)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return response.get_json(), len(savepoints)
+
+
+def test_valid_batch_is_flushed_at_once(generated_app):
+
+    result, savepoints = post_counting_savepoints(generated_app, "/users/batch", new_users(50))
+
+    assert result["status"] == "ok"
+    assert all(item["status"] == "ok" and item["id"] for item in result["items"])
+    assert savepoints == 1
+
+
+def test_refused_item_fails_alone(generated_app):
+
+    client = generated_app.test_client()
+    taken = client.get("/users/3").get_json()["phone"]
+
+    users = new_users(3)
+    users[1]["phone"] = taken
+
+    result, savepoints = post_counting_savepoints(generated_app, "/users/batch", users)
+
+    assert result["status"] == "ok"
+    assert [item["status"] for item in result["items"]] == ["ok", "error", "ok"]
+    assert savepoints == 1 + len(users)
+
+    for item in (result["items"][0], result["items"][2]):
+        user = client.get(f"/users/{item['id']}").get_json()
+        assert user["phone"] in (users[0]["phone"], users[2]["phone"])
+
+
+def test_invalid_items_do_not_reach_the_database(generated_app):
+
+    users = new_users(2)
+    users[0]["age"] = 17
+
+    result, savepoints = post_counting_savepoints(generated_app, "/users/batch", users)
+
+    assert [item["status"] for item in result["items"]] == ["error", "ok"]
+    assert savepoints == 1
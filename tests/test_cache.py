@@ -0,0 +1,127 @@
+"""
+    response cache: LRU, TTL, byte budget and invalidation
+"""
+
+# global imports
+import time
+
+# local imports
+from grm import ResponseCache, response_cache
+
+
+def test_hit_after_set():
+
+    cache = ResponseCache()
+    key = cache.key("users", "AllUsersAdapter", 5, 0)
+
+    assert cache.get(key) is None
+    cache.set(key, b"[]")
+
+    assert cache.get(key) == b"[]"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache = ResponseCache(ttl=30)
+    key = cache.key("users", 1)
+    cache.set(key, b"{}")
+
+    now += 31
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+
+    cache = ResponseCache(max_entries=2)
+    first, second, third = (cache.key("users", index) for index in range(3))
+
+    cache.set(first, b"1")
+    cache.set(second, b"2")
+    cache.get(first)
+    cache.set(third, b"3")
+
+    assert cache.get(second) is None
+    assert cache.get(first) == b"1"
+    assert cache.get(third) == b"3"
+    assert cache.evictions == 1
+
+
+def test_byte_budget():
+
+    cache = ResponseCache(max_bytes=10)
+
+    cache.set(cache.key("users", "big"), b"x" * 11)
+    assert cache.stats()["entries"] == 0
+
+    cache.set(cache.key("users", 1), b"x" * 6)
+    cache.set(cache.key("users", 2), b"x" * 6)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 6
+
+
+def test_invalidate_drops_the_namespace_only():
+
+    cache = ResponseCache()
+    users, orders = cache.key("users", 1), cache.key("orders", 1)
+    cache.set(users, b"u")
+    cache.set(orders, b"o")
+
+    cache.invalidate("users")
+
+    assert cache.get(users) is None
+    assert cache.get(orders) == b"o"
+
+
+def test_response_computed_before_a_write_is_not_stored():
+
+    cache = ResponseCache()
+    key = cache.key("users", 1)
+
+    cache.invalidate("users")
+    cache.set(key, b"stale")
+
+    assert cache.get(key) is None
+    assert cache.get(cache.key("users", 1)) is None
+
+
+def test_versioned_keys_differ_by_version():
+
+    cache = ResponseCache()
+
+    with cache.versioned(("users", (1,))):
+        key = cache.key("users", 1)
+        cache.set(key, b"v1")
+
+    with cache.versioned(("users", (2,))):
+        assert cache.get(cache.key("users", 1)) is None
+
+    with cache.versioned(("users", (1,))):
+        assert cache.get(cache.key("users", 1)) == b"v1"
+
+
+def test_disabled_cache_stores_nothing():
+
+    cache = ResponseCache(max_entries=0)
+    key = cache.key("users", 1)
+    cache.set(key, b"[]")
+
+    assert cache.get(key) is None
+
+
+def test_repeated_get_is_served_from_the_cache_until_a_write(client):
+
+    first = client.get("/users/?limit=1000")
+    hits = response_cache.hits
+
+    assert client.get("/users/?limit=1000").data == first.data
+    assert response_cache.hits == hits + 1
+
+    assert client.put("/users/3", json={"first_name": "Aaron"}).get_json()["status"] == "ok"
+
+    users = {user["id"]: user for user in client.get("/users/?limit=1000").get_json()}
+    assert users[3]["first_name"] == "Aaron"
@@ -0,0 +1,23 @@
+"""
+    check_indexes on a freshly generated SQLite database
+"""
+
+# local imports
+from app_check_indexes import check_indexes, sqlite_full_scan
+
+
+def test_every_combination_uses_an_index(generate_app):
+
+    # enough rows for the planner to prefer the indexes it would in production
+    app = generate_app(users=2000)
+
+    with app.app_context():
+        assert check_indexes() == []
+
+
+def test_full_scans_of_both_sqlite_plan_formats():
+
+    # SQLite before 3.36 prints "SCAN TABLE users"
+    assert sqlite_full_scan.match("SCAN users").group(1) == "users"
+    assert sqlite_full_scan.match("SCAN TABLE users AS u").group(1) == "users"
+    assert sqlite_full_scan.match("SCAN users USING INDEX ix_users_age") is None
@@ -0,0 +1,58 @@
+"""
+    streamed NDJSON and CSV exports
+"""
+
+# global imports
+import csv
+import io
+import json
+
+import pytest
+
+# local imports
+from grm import BaseExportAdapter
+
+
+def ndjson_rows(response) -> list:
+    return [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+
+
+def test_ndjson_export_has_every_user_once(client):
+
+    response = client.get("/users/export")
+    rows = ndjson_rows(response)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert len(rows) == client.get("/users/count").get_json()["count"]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+    listed = {user["id"]: user for user in client.get("/users/?limit=100000").get_json()}
+    assert {row["id"]: row for row in rows} == listed
+
+
+def test_csv_export_matches_the_json_fields(client):
+
+    response = client.get("/orders/export?format=csv")
+    rows = list(csv.DictReader(io.StringIO(response.data.decode("utf-8"))))
+
+    assert response.mimetype == "text/csv"
+    assert len(rows) == client.get("/orders/count").get_json()["count"]
+
+    order = client.get(f"/orders/{rows[0]['id']}").get_json()
+    assert {key: str(value) for key, value in order.items() if key in rows[0]} == \
+        {key: value for key, value in rows[0].items() if key in order}
+
+
+@pytest.mark.parametrize("path", ["/users/export", "/orders/export", "/offers/export"])
+def test_chunk_size_does_not_change_the_export(client, monkeypatch, path):
+
+    expected = client.get(path).data
+
+    monkeypatch.setattr(BaseExportAdapter, "chunk_size", 7)
+
+    assert client.get(path).data == expected
+
+
+def test_unknown_format_exports_ndjson(client):
+
+    assert client.get("/offers/export?format=xml").data == client.get("/offers/export").data
@@ -0,0 +1,85 @@
+"""
+    models checkers against their reference implementations
+"""
+
+# global imports
+import random
+import re
+
+# local imports
+from main.models_checkers import check_name, validate_users, \
+    check_age, check_email, check_role, check_phone, \
+    is_email, email_regex, phone_regex, PHONE_MAX_LENGTH
+from reference_checkers import reduce_check_name, random_names
+
+
+def test_check_name_matches_reduce_implementation():
+
+    generator = random.Random(11)
+    names = random_names(generator, 50_000) + [None, 5, "", "Hudson", "Иван", "O'Neil", "Ёлка"]
+
+    for name in names:
+        assert check_name(name) == reduce_check_name(name), repr(name)
+
+
+def test_validate_users_matches_single_checks():
+
+    generator = random.Random(11)
+    names = random_names(generator, 1000) + [None, 5, ""]
+
+    users = [{
+        "first_name": generator.choice(names),
+        "last_name": generator.choice(names),
+        "age": generator.choice([17, 18, 40, 66, None, "40"]),
+        "email": generator.choice(["a@b.c", "wrong", None]),
+        "role": generator.choice(["customer", "executor", "admin"]),
+        "phone": generator.choice(["6197021684", "+1 (619) 702-1684", "phone"]),
+    } for _ in range(5000)] + [None, "user"]
+
+    expected = [
+        ["Wrong user type"] if not isinstance(user, dict) else [message for message in [
+            reduce_check_name(user["first_name"]),
+            reduce_check_name(user["last_name"]),
+            check_age(user["age"]),
+            check_email(user["email"]),
+            check_role(user["role"]),
+            check_phone(user["phone"]),
+        ] if message is not None]
+        for user in users
+    ]
+
+    assert validate_users(users) == expected
+
+
+def test_is_email_matches_email_regex():
+
+    generator = random.Random(12)
+    alphabet = 'aZ9.@"\\[] \t!~-яé\n'
+
+    for _ in range(100_000):
+        text = "".join(generator.choice(alphabet) for _ in range(generator.randint(0, 12)))
+        assert is_email(text) == bool(re.fullmatch(email_regex, text)), repr(text)
+
+
+# the pattern before the length cap
+original_phone_regex = re.compile(r"^\+?\d{1,4}?[-.\s]?\(?\d{1,3}?\)?[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}$")
+
+
+def test_check_phone_matches_original_regex_up_to_the_cap():
+
+    generator = random.Random(12)
+    # digits weighted up, so several thousand of the inputs are valid phones
+    alphabet = "0123456789" * 2 + "+-. ()\t\n٣x"
+
+    for _ in range(100_000):
+        text = "".join(generator.choice(alphabet) for _ in range(generator.randint(1, PHONE_MAX_LENGTH)))
+        expected = "Wrong phone." if not re.fullmatch(original_phone_regex, text) else None
+        assert check_phone(text) == expected, repr(text)
+
+
+def test_phone_regex_fits_the_phone_column():
+
+    longest = "+1234-(123)-1234-1234-123456789"
+
+    assert re.fullmatch(phone_regex, longest[:PHONE_MAX_LENGTH])
+    assert not re.fullmatch(phone_regex, longest)
@@ -0,0 +1,91 @@
+"""
+    keyset pagination: cursors against the offset pages, NULL sort keys included
+"""
+
+# global imports
+import datetime
+
+import pytest
+from sqlalchemy import insert
+
+# local imports
+from grm.pagination import encode_cursor, decode_cursor
+from main.models import db, Offer
+from main.versions import bump_versions
+
+
+def add_offers_without_order(app, count: int):
+    """ Offers of an order that does not exist, their order start date is NULL """
+
+    with app.app_context():
+        session = db.session
+        session.execute(insert(Offer), [
+            {"order_id": 10 ** 6, "executor_id": 3 + index % 5, "is_approved": False} for index in range(count)
+        ])
+        bump_versions(session, "offers")
+        session.commit()
+
+
+def walk(client, path: str, order_by: str, limit: int) -> list:
+    """ Ids of every page of path, following next_cursor from the first page """
+
+    ids = []
+    cursor = ""
+
+    while cursor is not None:
+        page = client.get(path, query_string={"limit": limit, "order_by": order_by, "cursor": cursor}).get_json()
+        assert len(page["items"]) <= limit
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+
+    return ids
+
+
+@pytest.mark.parametrize("order_by", ["order_date", "order_date_asc"])
+def test_cursor_pages_cross_the_null_boundary(generated_app, order_by):
+
+    add_offers_without_order(generated_app, 12)
+    client = generated_app.test_client()
+
+    everything = client.get("/offers/", query_string={"limit": 10 ** 6, "order_by": order_by}).get_json()
+    expected = [item["id"] for item in everything]
+
+    assert None in [item["start"] for item in everything]
+    assert len(set(expected)) == len(expected)
+
+    assert walk(client, "/offers/", order_by, 7) == expected
+
+
+@pytest.mark.parametrize("order_by", ["default", "owner", "age_asc"])
+def test_cursor_pages_match_the_offset_pages(client, order_by):
+
+    everything = client.get("/users/", query_string={"limit": 10 ** 6, "order_by": order_by}).get_json()
+
+    assert walk(client, "/users/", order_by, 11) == [item["id"] for item in everything]
+
+
+def test_last_page_has_no_next_cursor(client):
+
+    count = client.get("/users/count").get_json()["count"]
+
+    page = client.get("/users/", query_string={"limit": count, "cursor": ""}).get_json()
+    assert len(page["items"]) == count
+    assert page["next_cursor"] is not None
+
+    last = client.get("/users/", query_string={"limit": count, "cursor": page["next_cursor"]}).get_json()
+    assert last == {"items": [], "next_cursor": None}
+
+
+def test_cursor_round_trip():
+
+    values = [datetime.date(2021, 1, 31), None, "Hudson", 7]
+
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", encode_cursor(["x"])[:-2], "e30"])
+def test_corrupt_cursor_starts_from_the_first_page(client, cursor):
+
+    first = client.get("/users/", query_string={"limit": 5, "cursor": ""}).get_json()
+
+    assert client.get("/users/", query_string={"limit": 5, "cursor": cursor}).get_json() == first
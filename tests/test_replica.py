@@ -0,0 +1,58 @@
+"""
+    read replica routing, with a copy of the primary SQLite file as the replica
+"""
+
+# global imports
+import shutil
+
+# local imports
+from grm import replica
+
+
+def sticky(client) -> bool:
+    """ The client holds the cookie that keeps its reads on the primary """
+
+    return any(cookie.name == replica.cookie_name for cookie in client.cookie_jar)
+
+
+def test_reads_go_to_the_replica_and_writers_read_the_primary(generate_app, database_uri, tmp_path, monkeypatch):
+
+    replica_path = tmp_path / "replica.sqlite3"
+    monkeypatch.setenv("DB_REPLICA_URI", f"sqlite:///{replica_path}")
+
+    app = generate_app()
+
+    # a replica that stopped replicating right after the generation
+    shutil.copyfile(database_uri.removeprefix("sqlite:///"), replica_path)
+
+    writer = app.test_client()
+    reader = app.test_client()
+
+    name = reader.get("/users/3").get_json()["first_name"]
+    assert writer.put("/users/3", json={"first_name": "Mary" if name != "Mary" else "Anna"}).get_json()["status"] == "ok"
+    written = writer.get("/users/3").get_json()["first_name"]
+
+    assert written != name
+    assert sticky(writer)
+
+    # the reader has no cookie: the lagging replica answers
+    replica_queries = replica.replica_queries
+    assert reader.get("/users/3").get_json()["first_name"] == name
+    assert reader.get("/users/?limit=100").status_code == 200
+    assert replica.replica_queries > replica_queries
+
+    # the writer's cookie keeps its reads on the primary, the cache included
+    primary_queries = replica.primary_queries
+    assert writer.get("/users/3").get_json()["first_name"] == written
+    assert replica.primary_queries > primary_queries
+
+
+def test_without_a_replica_every_read_is_on_the_primary(client):
+
+    replica_queries = replica.replica_queries
+
+    assert client.put("/users/3", json={"first_name": "Mary"}).get_json()["status"] == "ok"
+    assert client.get("/users/3").get_json()["first_name"] == "Mary"
+
+    assert not sticky(client)
+    assert replica.replica_queries == replica_queries
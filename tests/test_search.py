@@ -0,0 +1,51 @@
+"""
+    orders full-text search
+"""
+
+# global imports
+import re
+
+
+def search(client, q: str, limit: int = 1000) -> list:
+    response = client.get("/orders/search", query_string={"q": q, "limit": limit})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def text_words(order: dict) -> set:
+    return {word.lower() for word in re.findall(r"\w+", " ".join([order["name"], order["description"], order["address"]]))}
+
+
+def test_results_contain_every_word(client):
+
+    order = client.get("/orders/1").get_json()
+    words = sorted(text_words(order), key=len)[-2:]
+
+    results = search(client, " ".join(words))
+
+    assert 1 in [result["id"] for result in results]
+    assert all(set(words) <= text_words(result) for result in results)
+
+
+def test_writes_update_the_index(client):
+
+    assert search(client, "Zanzibarian") == []
+
+    description = "Deliver the crates to the Zanzibarian coast by boat"
+    assert client.put("/orders/2", json={"description": description}).get_json()["status"] == "ok"
+    assert [result["id"] for result in search(client, "zanzibarian")] == [2]
+
+    assert client.delete("/orders/2").get_json()["status"] == "ok"
+    assert search(client, "Zanzibarian") == []
+
+
+def test_queries_without_words_find_nothing(client):
+
+    assert search(client, "") == []
+    assert search(client, " -*\"() ") == []
+
+
+def test_search_operators_are_plain_words(client):
+
+    for q in ['"unbalanced', "a OR b", "NEAR(a b)", "name:x", "x*"]:
+        search(client, q)
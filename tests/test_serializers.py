@@ -0,0 +1,22 @@
+"""
+    grm serializers
+"""
+
+# local imports
+from grm import get_serializer
+from main.models import User
+
+
+def test_serializer_of_no_columns():
+
+    serializer = get_serializer(User, [])
+
+    assert serializer(User(first_name="Ivan")) == {}
+    assert serializer(None) is None
+
+
+def test_serializer_renames_columns():
+
+    serializer = get_serializer(User, ["id", "first_name"], {"first_name": "name"})
+
+    assert serializer(User(id=1, first_name="Ivan")) == {"id": 1, "name": "Ivan"}
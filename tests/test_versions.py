@@ -0,0 +1,60 @@
+"""
+    ETags from the table versions, and the response cache across workers
+"""
+
+# global imports
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+root = Path(__file__).resolve().parent.parent
+
+
+def write_from_another_worker(path: str, json_object: dict):
+    """ PUT through a second app in its own process, with its own response cache """
+
+    code = (
+        "import sys\n"
+        "from app import create_app\n"
+        f"response = create_app().test_client().put({path!r}, json={json_object!r})\n"
+        "sys.exit(response.get_json()['status'] != 'ok')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=root, env=os.environ, check=True)
+
+
+def test_matching_etag_gets_304(client):
+
+    response = client.get("/users/3")
+    assert response.status_code == 200
+
+    again = client.get("/users/3", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == response.headers["ETag"]
+
+
+def test_write_changes_the_etag(client):
+
+    before = client.get("/users/3")
+    assert client.put("/users/3", json={"first_name": "Mary"}).get_json()["status"] == "ok"
+
+    after = client.get("/users/3", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.get_json()["first_name"] == "Mary"
+
+
+def test_write_of_another_worker_is_not_served_from_the_cache(client):
+
+    # the second GET is answered from this process' response cache
+    client.get("/users/3")
+    cached = client.get("/users/3")
+    assert cached.get_json()["first_name"] != "Mary"
+
+    write_from_another_worker("/users/3", {"first_name": "Mary"})
+
+    after = client.get("/users/3")
+    assert after.headers["ETag"] != cached.headers["ETag"]
+    assert after.get_json()["first_name"] == "Mary"
+
+    assert client.get("/users/3", headers={"If-None-Match": after.headers["ETag"]}).status_code == 304